@@ -0,0 +1,35 @@
+import contextlib
+import os
+
+
+def sync_directory(path):
+    # Makes a rename inside the directory of `path` durable. Not every platform
+    # lets a directory be opened, in which case there is nothing more to do.
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w", **kwargs):
+    # Writes go to a temporary file next to `path`, which replaces it only after
+    # the data is on disk: a crash leaves either the old file or the new one.
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, mode, **kwargs) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    sync_directory(path)
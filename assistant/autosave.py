@@ -0,0 +1,34 @@
+import sys
+import threading
+
+
+class AutoSaver(threading.Thread):
+    # Saves the book every `interval` seconds if anything changed since the last
+    # save, so a burst of edits costs one write and an idle book costs none.
+    # A journaled book is skipped: each change is already on disk in the
+    # journal, and compaction rewrites the snapshot often enough.
+
+    def __init__(self, book, interval=5.0):
+        super().__init__(name="autosave", daemon=True)
+        self.book = book
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.save()
+
+    def save(self):
+        if getattr(self.book, "journaled", False) or not self.book.dirty:
+            return
+        # Any failure is reported and retried next time: an exception escaping
+        # here would end the thread and silently stop all later saves.
+        try:
+            self.book.save_data()
+        except Exception as error:
+            print(f"/// Autosave failed: {error}", file=sys.stderr)
+
+    def stop(self):
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
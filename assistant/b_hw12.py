@@ -1,34 +1,104 @@
-from cl_hw12 import AddressBook, Name, Phone, Birthday, Record
+from cl_hw12 import AddressBook, Name, Phone, Birthday, Record, DuplicatePhoneError, TooManyPhonesError, render_records
 from datetime import datetime
+from autosave import AutoSaver
+from lazy_book import LazyAddressBook
+from metrics import metrics
+from collections.abc import Iterator
+import argparse
+import sys
+import time
+
+
+def open_address_book(storage="json", file_path=None, shards=4, snapshot_format=None, compression="zlib"):
+    if storage == "mmap":
+        from mmap_store import MappedAddressBook
+        return MappedAddressBook(file_path or "address_book.abm")
+    if storage == "sqlite":
+        from sqlite_book import SQLiteAddressBook
+        return SQLiteAddressBook(file_path or "address_book.db")
+    if storage == "sharded":
+        from sharded_book import ShardedAddressBook
+        return ShardedAddressBook(file_path or "address_book.json", shards)
+    return AddressBook(
+        file_path or "address_book.json", journal=True, snapshot_format=snapshot_format, compression=compression
+    )
+
+
+# Set by main() (or by whoever drives the handlers) to the book the commands work on.
+address_book = None
+SEARCH_LIMIT = 50
+PROFILE_LINES = 15
 
 
-address_book = AddressBook()
+def input_error(func):
+    command = func.__name__.removesuffix("_handler")
 
+    def handle(*args):
+        try:
+            return func(*args), None
+        except KeyError as error:
+            return "/// Contact not found.", error
+        except (DuplicatePhoneError, TooManyPhonesError) as error:
+            return f"/// {error}", error
+        except ValueError as error:
+            return "/// Invalid input. Provide a 10-digit number in the format [1234567890] or Date of birth in the format [XX.XX.XXXX]", error
+        except IndexError as error:
+            return "/// Invalid command. Type \"help\" to show all commands.", error
 
-def input_error(func):
     def wrapper(*args):
+        if not metrics.enabled:
+            return handle(*args)[0]
+        started = time.perf_counter()
+        result = error = None
         try:
-            return func(*args)
-        except KeyError:
-            return "/// Contact not found."
-        except ValueError:
-            return "/// Invalid input. Provide a 10-digit number in the format [1234567890] or Date of birth in the format [XX.XX.XXXX]"
-        except IndexError:
-            return "/// Invalid command. Type \"help\" to show all commands."
+            result, error = handle(*args)
+        except Exception as unexpected:  # counted, then left to the caller
+            error = unexpected
+            raise
+        finally:
+            if not isinstance(result, Iterator):
+                metrics.observe(command, time.perf_counter() - started, error)
+        if isinstance(result, Iterator):
+            return observed(command, started, result)
+        return result
+
     return wrapper
 
 
+def observed(command, started, chunks):
+    # Streamed output (sc all) is produced while it is printed, so the command
+    # is timed until its last chunk, and an error on the way counts too.
+    error = None
+    try:
+        yield from chunks
+    except Exception as unexpected:
+        error = unexpected
+        raise
+    finally:
+        metrics.observe(command, time.perf_counter() - started, error)
+
+
 help_info = """/// Commands:
 /// "hello" or "hi" - Greet the assistant and start a conversation.
 /// "add [name] [phone] [birthday]" - Add a new contact to the address book. Birthday is optional and should be in the format 'dd.mm.yyyy'.
 /// "changephone [name] [old_phone] [new_phone]" or "cp [name] [old_phone] [new_phone]" - Change the phone number for a contact.
 /// "changebirthdate [name] [new_date]" or "cb [name] [new_date]" - Change the birthdate for a contact.
 /// "delete [name]" or "d [name]" - Delete a contact from the address book.
-/// "search [term]" or "find [term]" - Search for contacts based on a search term (name or phone number).
+/// "search [term] --limit [N] --offset [N]" or "find [term]" - Search for contacts by name or phone number, best matches first: exact phone, then names and phones starting with the term, then the rest. Shows 50 matches unless --limit is given.
+/// "fuzzy [name] [max_distance]" or "ff [name] [max_distance]" - Find contacts whose name is within [max_distance] typos (0-2, default 2), closest first.
+/// "whois [phone]" or "who [phone]" - Show the contact(s) owning a phone number.
+/// "birthdays [days]" or "bd [days]" - Show contacts with a birthday in the next [days] days (7 by default).
+/// "bd next [count]" - Show the [count] nearest birthdays (10 by default). "bd month [1-12]" - Show the birthdays in a month. "bd age [min] [max]" - Show contacts aged [min] to [max] today, youngest first.
 /// "showcontacts all" or "sc all" - Show all contacts in the address book.
-/// "showcontacts [page_number]" or "sc [page_number]" - Show contacts page by page. Enter 'all' to display all contacts at once.
+/// "showcontacts [page_number] [page_size]" or "sc [page_number] [page_size]" - Show contacts page by page in name order. Enter 'all' to display all contacts at once.
+/// "showcontacts after [name] [page_size]" or "sc after [name] [page_size]" - Show the page of contacts that follows [name].
+/// "import [file] [report_file]" - Import contacts from a .csv (name,phones,birthday; phones separated by ';') or .vcf file. Contacts already in the book are replaced; rejected rows are listed in [report_file] (next to the file by default).
+/// "export [file]" - Export all contacts to a .csv or .vcf file.
+/// "stats" - Show call counts, errors and latencies per command, and load/save timings. "stats json [file]" and "stats prometheus [file]" export them, "stats reset" clears them, "stats on/off" starts or stops collecting.
+/// "profile [command]" - Run [command] under cProfile and show where its time went, e.g. "profile search ann".
+/// Press Tab to complete a command or a contact name; names are matched without regard to case.
 /// "help" - Show this help message.
-/// "exit", "bye", "good bye", "close", "quit", "q" - Turn off the assistant and save the address book data.
+/// "exit", "bye", "good bye", "close", "quit", "q" - Turn off the assistant. Changes are saved to the journal as they are made and folded into the address book file on exit.
 """
 
 
@@ -116,19 +186,191 @@ def search_handler(*args):
         return "/// Invalid command. Please provide a search term."
 
     search_term = args[0].lower()
-    matching_contacts = []
-
-    for contact in address_book.get_all_contacts():
-        if (search_term in str(contact.name).lower()) or any(search_term in str(phone.value).lower() for phone in contact.phones):
-            matching_contacts.append(contact)
+    options = {"--limit": SEARCH_LIMIT, "--offset": 0}
+    rest = list(args[1:])
+    while rest:
+        option = rest.pop(0)
+        if option not in options or not rest or not rest[0].isdigit():
+            return "/// Invalid search options. Use \"search [term] --limit [N] --offset [N]\"."
+        options[option] = int(rest.pop(0))
+    limit, offset = options["--limit"], options["--offset"]
+
+    # One match past the limit tells whether there is more to show.
+    matching_contacts = list(address_book.query(search_term, limit + 1, offset))
 
     if not matching_contacts:
         return f"/// No contacts found matching the search term: \"{search_term}\""
-    
-    output = [str(record) for record in matching_contacts]
+
+    output = [str(record) for record in matching_contacts[:limit]]
+    if len(matching_contacts) > limit:
+        output.append(f"/// More matches available. Use \"search {search_term} --limit {limit} --offset {offset + limit}\" to see them.")
+    return "\n".join(output)
+
+
+@input_error
+def fuzzy_handler(*args):
+    if len(args) == 0:
+        return "/// Invalid command. Please provide a name to look for."
+
+    max_distance = int(args[1]) if len(args) > 1 else 2
+    if not 0 <= max_distance <= 2:
+        return "/// Invalid distance. Please provide a number from 0 to 2."
+
+    matches = address_book.fuzzy_search(args[0], max_distance, limit=20)
+    if not matches:
+        return f"/// No contacts found within {max_distance} typos of \"{args[0]}\""
+
+    output = [str(record) for _, record in matches]
+    return "\n".join(output)
+
+
+@input_error
+def import_handler(*args):
+    if len(args) == 0:
+        return "/// Invalid command. Please provide a .csv or .vcf file to import."
+
+    from bulk_io import ImportStopped, import_contacts
+    try:
+        imported, rejected, report_path = import_contacts(address_book, args[0], report_path=args[1] if len(args) > 1 else None)
+    except ImportStopped as stopped:
+        return f"/// Import of {args[0]} stopped after {stopped.imported} contacts, which were kept: {stopped.error}"
+    except OSError as error:
+        return f"/// Cannot import {args[0]}: {error.strerror}."
+    except ValueError as error:
+        return f"/// {error}"
+
+    if rejected:
+        return f"/// Imported {imported} contacts from {args[0]}. {rejected} rows rejected, see {report_path}."
+    return f"/// Imported {imported} contacts from {args[0]}."
+
+
+@input_error
+def export_handler(*args):
+    if len(args) == 0:
+        return "/// Invalid command. Please provide a .csv or .vcf file to export to."
+
+    from bulk_io import export_contacts
+    try:
+        count = export_contacts(address_book, args[0])
+    except OSError as error:
+        return f"/// Cannot export to {args[0]}: {error.strerror}."
+    except ValueError as error:
+        return f"/// {error}"
+    return f"/// Exported {count} contacts to {args[0]}."
+
+
+@input_error
+def whois_handler(*args):
+    if len(args) == 0:
+        return "/// Invalid command. Please provide a phone number."
+
+    owners = address_book.whois(args[0])
+    if not owners:
+        return f"/// No contacts with phone number {args[0]}."
+
+    output = [str(record) for record in owners]
     return "\n".join(output)
 
 
+@input_error
+def birthdays_handler(*args):
+    action = args[0].lower() if args else ""
+    if action in ("next", "month", "age"):
+        return birthdays_query(action, args[1:])
+    try:
+        days = int(args[0]) if args else 7
+    except ValueError:
+        days = -1
+    if days < 0:
+        return "/// Invalid number of days. Please provide a non-negative integer."
+
+    upcoming = address_book.upcoming_birthdays(days)
+    if not upcoming:
+        return f"/// No birthdays in the next {days} days."
+
+    return "\n".join(render_records(record for _, record in upcoming))
+
+
+def birthdays_query(action, args):
+    try:
+        numbers = [int(arg) for arg in args]
+    except ValueError:
+        numbers = [-1]
+    if any(number < 0 for number in numbers):
+        return "/// Invalid number. Please provide non-negative integers."
+
+    if action == "next":
+        records = [record for _, record in address_book.nearest_birthdays(numbers[0] if numbers else 10)]
+        empty = "/// No contacts with a birthday."
+    elif action == "month":
+        if len(numbers) != 1 or not 1 <= numbers[0] <= 12:
+            return "/// Invalid month. Please provide a month number from 1 to 12."
+        records = address_book.birthdays_in_month(numbers[0])
+        empty = f"/// No birthdays in month {numbers[0]}."
+    else:
+        if not numbers:
+            return "/// Invalid command. Please provide an age or an age range, e.g. 'bd age 30' or 'bd age 20 29'."
+        min_age, max_age = numbers[0], numbers[-1]
+        records = [record for _, record in address_book.contacts_aged(min_age, max_age)]
+        empty = f"/// No contacts aged {min_age}-{max_age}." if min_age != max_age else f"/// No contacts aged {min_age}."
+    if not records:
+        return empty
+    return "\n".join(render_records(records))
+
+
+@input_error
+def stats_handler(*args):
+    action = args[0].lower() if args else "show"
+    if action in ("on", "off"):
+        metrics.enabled = action == "on"
+        return f"/// Metrics collection is {action}."
+    if action == "reset":
+        metrics.reset()
+        return "/// Metrics reset."
+    if action not in ("show", "json", "prometheus"):
+        return "/// Invalid command. Use \"stats\", \"stats json [file]\", \"stats prometheus [file]\", \"stats reset\" or \"stats on/off\"."
+
+    if action == "show":
+        note = "" if metrics.enabled else "\n/// Command metrics are off; turn them on with \"stats on\" or --metrics."
+        return metrics.summary() + note
+    text = metrics.to_json() if action == "json" else metrics.to_prometheus()
+    if len(args) < 2:
+        return text.rstrip("\n")
+    try:
+        with open(args[1], "w") as file:
+            file.write(text)
+    except OSError as error:
+        return f"/// Cannot write {args[1]}: {error.strerror}."
+    return f"/// Metrics written to {args[1]}."
+
+
+@input_error
+def profile_handler(*args):
+    if len(args) == 0:
+        return "/// Invalid command. Please provide a command to profile, e.g. \"profile search ann\"."
+
+    import cProfile
+    import io
+    import pstats
+
+    handler, data = parser(" ".join(args))
+    if handler in (exit_handler, profile_handler):
+        return "/// This command can't be profiled."
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = handler(*data)
+        if not isinstance(result, str):
+            result = "\n".join(result)
+    finally:
+        profiler.disable()
+
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    lines = [line for line in report.getvalue().splitlines() if line.strip()]
+    return result + "\n" + "\n".join(f"/// {line}" for line in lines)
+
+
 def exit_handler(*args):
     return "/// Good bye!"
 
@@ -137,47 +379,79 @@ def exit_handler(*args):
 def unknown_handler(*args):
     return "/// Invalid command. Type \"help\" to show all commands."
 
-def show_contacts_page(page_number):
-    contacts = address_book.get_all_contacts()
-    total_pages = (len(contacts) - 1) // 10 + 1
+def show_contacts_page(page_number, page_size=None):
+    total_pages = address_book.page_count(page_size)
     if page_number < 1 or page_number > total_pages:
         return f"/// Invalid page number. Please provide a page number between 1 and {total_pages}."
 
-    page_size = 10
-    start_index = (page_number - 1) * page_size
-    end_index = start_index + page_size
-    contacts_page = contacts[start_index:end_index]
+    contacts_page = address_book.page(page_number, page_size)
     if not contacts_page:
         return f"/// Page {page_number} is empty. Available pages: (1-{total_pages})."
 
     header = f"/// --- Contacts Page {page_number}/{total_pages} --- "
-    output = [str(record) for record in contacts_page]
-    page_content = "\n".join(output)
+    page_content = "\n".join(render_records(contacts_page))
     footer = f"/// ---  End of Page {page_number}/{total_pages}  --- "
 
     return f"{header}\n{page_content}\n{footer}"
 
 
+def show_contacts_after(cursor, page_size=None):
+    contacts_page, next_cursor = address_book.page_after(cursor, page_size)
+    if not contacts_page:
+        return f"/// No contacts after \"{cursor}\"."
+
+    output = [str(record) for record in contacts_page]
+    footer = f"/// --- Next page: \"sc after {next_cursor}\" --- "
+    return "\n".join(output) + f"\n{footer}"
+
+
+def stream_contacts(chunk_size=500):
+    for records in address_book.iter_batches(chunk_size):
+        yield "\n".join(render_records(records))
+
+
 @input_error
 def show_all_handler(*args):
     if len(args) == 0:
         return "/// Invalid command. Please provide 'all' or page number (e.g., '1', '2', 'sc all', 'sc 1', etc.)."
 
     if args[0] == "all":
-        contacts = address_book.get_all_contacts()
-        if contacts:
-            output = [str(record) for record in contacts]
-            return "\n".join(output)
+        if len(address_book):
+            return stream_contacts()
         else:
             return "/// No contacts found in the address book."
+    elif args[0] == "after" and len(args) > 1:
+        try:
+            page_size = int(args[2]) if len(args) > 2 else None
+        except ValueError:
+            return "/// Invalid page size. Please provide a positive integer."
+        return show_contacts_after(args[1], page_size)
     else:
         try:
             page_number = int(args[0])
-            return show_contacts_page(page_number)
+            page_size = int(args[1]) if len(args) > 1 else None
+            if page_size is not None and page_size < 1:
+                raise ValueError
+            return show_contacts_page(page_number, page_size)
         except ValueError:
             return "/// Invalid page number. Please provide a positive integer page number or 'all'."
 
 
+def print_result(result):
+    # Handlers return either a string or an iterable of chunks, written out as they come.
+    if isinstance(result, str):
+        print(result)
+        return
+    for chunk in result:
+        sys.stdout.write(chunk)
+        sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def show_everything_handler(*args):
+    return show_all_handler("all", *args)
+
+
 COMMANDS = {
     hello_handler: ("hello", "hi"),
     add_handler: ("add", "+", "plus"),
@@ -185,43 +459,199 @@ COMMANDS = {
     cd_handler: ("changebirthdate", "cb"),
     delete_handler: ("delete", "d"),
     search_handler: ("search", "find", "f"),
+    birthdays_handler: ("birthdays", "bd"),
+    whois_handler: ("whois", "who"),
+    fuzzy_handler: ("fuzzy", "ff"),
+    import_handler: ("import",),
+    export_handler: ("export",),
+    stats_handler: ("stats",),
+    profile_handler: ("profile",),
     exit_handler: ("bye", "exit", "break", "good bye", "close", "quit", "q"),
-    show_all_handler: ("sc all", "showcontacts all", "sc", "showcontacts"),
-    help_handler: ("help"),
+    show_everything_handler: ("sc all", "showcontacts all"),
+    show_all_handler: ("sc", "showcontacts"),
+    help_handler: ("help",),
 }
 
+# Alias -> handler, matched on the longest prefix of the input's words.
+COMMAND_TABLE = {
+    " ".join(alias.split()): handler
+    for handler, aliases in COMMANDS.items()
+    for alias in aliases
+}
+# Handlers that never touch the book, so they answer while it is still loading.
+OFFLINE_HANDLERS = {hello_handler, help_handler, stats_handler, unknown_handler, exit_handler}
+# First word -> word count of the longest alias starting with it, for multi-word aliases only.
+ALIAS_WORDS = {}
+for alias in COMMAND_TABLE:
+    words = alias.split()
+    if len(words) > 1:
+        ALIAS_WORDS[words[0]] = max(ALIAS_WORDS.get(words[0], 1), len(words))
 
 
 def parser(text: str):
-    if not text.strip():
+    command_parts = text.split()
+    if not command_parts:
+        return unknown_handler, []
+
+    cmd = command_parts[0].lower()
+    if cmd in ALIAS_WORDS:
+        for size in range(min(len(command_parts), ALIAS_WORDS[cmd]), 1, -1):
+            handler = COMMAND_TABLE.get(" ".join(command_parts[:size]).lower())
+            if handler is not None:
+                return handler, command_parts[size:]
+
+    handler = COMMAND_TABLE.get(cmd)
+    if handler is None:
         return unknown_handler, []
+    return handler, command_parts[1:]
 
-    command_parts = text.strip().split()
-    cmd = command_parts[0]
-    data = command_parts[1:] if len(command_parts) > 1 else []
 
-    for handler, keywords in COMMANDS.items():
-        if cmd.lower() in keywords:
-            return handler, data
-    return unknown_handler, []
+COMPLETION_LIMIT = 100
 
 
-def main():
-    while True:
-        user_input = input("/// ---> ")
+def loaded_book():
+    # Replaces the LazyAddressBook stand-in with the book itself once it is needed,
+    # so later commands skip the indirection.
+    global address_book
+    if isinstance(address_book, LazyAddressBook):
+        address_book = address_book.wait()
+    return address_book
 
-        cmd, data = parser(user_input)
 
+def complete(text, state):
+    # readline completer: command words first, then contact names for the arguments.
+    if state == 0:
+        line = readline.get_line_buffer()[:readline.get_begidx()]
+        if not line.strip():
+            words = sorted({alias.split()[0] for alias in COMMAND_TABLE})
+            complete.matches = [word for word in words if word.startswith(text.lower())]
+        elif getattr(address_book, "loaded", True):
+            with address_book.lock:
+                complete.matches = address_book.complete(text, COMPLETION_LIMIT)
+        else:
+            complete.matches = []
+    matches = complete.matches
+    return matches[state] + " " if state < len(matches) else None
+
+
+def enable_completion():
+    global readline
+    try:
+        import readline
+    except ImportError:  # e.g. Windows without pyreadline
+        return
+    readline.set_completer(complete)
+    readline.set_completer_delims(" \t")
+    readline.parse_and_bind("tab: complete")
+
+
+def run_interactive(autosave_interval=5.0):
+    enable_completion()
+    saver = AutoSaver(address_book, autosave_interval) if autosave_interval else None
+    if saver:
+        saver.start()
+    try:
+        while True:
+            user_input = input("/// ---> ")
+
+            cmd, data = parser(user_input)
+
+            if cmd in OFFLINE_HANDLERS:
+                print_result(cmd(*data))
+            else:
+                # Waits for the book if it is still loading. The autosave thread
+                # takes the same lock, so it never saves half a command.
+                with loaded_book().lock:
+                    result = cmd(*data)
+                    try:
+                        print_result(result)
+                    except IndexError:
+                        print(unknown_handler())
+
+            if cmd == exit_handler:
+                break
+    finally:
+        if saver:
+            saver.stop()
+    address_book.close()
+
+
+def run_batch(lines, checkpoint=0, out=None, buffer_size=1000):
+    # Runs commands back to back, buffering their output, and saves the book once
+    # at the end (and every `checkpoint` commands). Returns (commands, seconds).
+    out = out or sys.stdout
+    loaded_book()
+    if getattr(address_book, "journal", None) is not None:
+        # The snapshot written at the end covers the batch, so skip per-command fsync and compaction.
+        address_book.journal.fsync_every = max(checkpoint, buffer_size)
+        address_book.compact_every = float("inf")
+
+    buffer = []
+    count = 0
+    started = time.perf_counter()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        cmd, data = parser(line)
         result = cmd(*data)
-        try:
-            print(result)
-        except IndexError:
-            print(unknown_handler())
-
+        buffer.append(result if isinstance(result, str) else "\n".join(result))
+        count += 1
         if cmd == exit_handler:
-            address_book.save_data()
             break
 
+        if checkpoint and count % checkpoint == 0:
+            address_book.save_data()
+        if len(buffer) >= buffer_size:
+            out.write("\n".join(buffer) + "\n")
+            buffer = []
+
+    if buffer:
+        out.write("\n".join(buffer) + "\n")
+    out.flush()
+    address_book.save_data()
+    return count, time.perf_counter() - started
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Address book assistant.")
+    arg_parser.add_argument("--batch", metavar="FILE", help="run commands from FILE ('-' for stdin) and exit")
+    arg_parser.add_argument("-i", "--interactive", action="store_true", help="prompt for commands even when stdin is not a terminal")
+    arg_parser.add_argument("--storage", choices=("json", "mmap", "sqlite", "sharded"), default="json", help="address book backend")
+    arg_parser.add_argument("--shards", type=int, default=4, help="worker processes for --storage sharded")
+    arg_parser.add_argument("--file", help="address book file (defaults to address_book.json/.abm/.db)")
+    arg_parser.add_argument("--snapshot", choices=("json", "binary"), help="save --storage json books in this format (default: keep the file's format)")
+    arg_parser.add_argument("--compression", choices=("none", "zlib", "lzma"), default="zlib", help="block compression of binary snapshots")
+    arg_parser.add_argument("--autosave", type=float, default=5.0, metavar="SECONDS", help="save changes in the background this often (0 disables); journaled books rely on the journal instead")
+    arg_parser.add_argument("--metrics", action="store_true", help="collect per-command metrics (see the stats command)")
+    arg_parser.add_argument("--unique-phones", action="store_true", help="refuse phone numbers that already belong to another contact")
+    arg_parser.add_argument("--checkpoint", type=int, default=0, metavar="N", help="in batch mode, save the book every N commands")
+    return arg_parser.parse_args(argv)
+
+
+def main(argv=None):
+    global address_book
+    args = parse_args(argv)
+
+    def load():
+        book = open_address_book(args.storage, args.file, args.shards, args.snapshot, args.compression)
+        book.unique_phones = args.unique_phones
+        return book
+
+    address_book = LazyAddressBook(load)
+    metrics.enabled = args.metrics
+    if args.batch is None and (args.interactive or sys.stdin.isatty()):
+        return run_interactive(args.autosave)
+
+    if args.batch in (None, "-"):
+        count, elapsed = run_batch(sys.stdin, args.checkpoint)
+    else:
+        with open(args.batch, "r") as file:
+            count, elapsed = run_batch(file, args.checkpoint)
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"/// Processed {count} commands in {elapsed:.3f} s ({rate:.0f} commands/s)", file=sys.stderr)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
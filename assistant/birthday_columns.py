@@ -0,0 +1,162 @@
+from array import array
+from datetime import date
+
+from birthday_index import next_birthday
+
+numpy = None  # set by use_numpy()
+_numpy_checked = False
+
+
+NO_BIRTHDAY = 0
+CODES = 13 * 32
+
+_table_day = None
+_table = None
+_numpy_table = None
+
+
+def use_numpy():
+    # NumPy takes longer to import than the rest of the CLI together, so it is
+    # only imported by the first whole-book query. None when it isn't
+    # installed; the stdlib arrays are walked in Python instead.
+    global numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+        numpy = module
+        _numpy_checked = True
+    return numpy
+
+
+def day_code(month, day):
+    # A birthday's (month, day) as one small int; 0 means no birthday.
+    return month * 32 + day
+
+
+def days_left_table(today):
+    # Days from `today` to the next birthday for every day code, -1 where there is
+    # none. Built with next_birthday(), so Feb 29 follows the same rules as
+    # Record.days_to_birthday; 2000 is only there to make Feb 29 a valid date.
+    global _table_day, _table, _numpy_table
+    if today != _table_day:
+        table = [-1] * CODES
+        for ordinal in range(date(2000, 1, 1).toordinal(), date(2000, 12, 31).toordinal() + 1):
+            birthday = date.fromordinal(ordinal)
+            table[day_code(birthday.month, birthday.day)] = (next_birthday(birthday, today) - today).days
+        _table = table
+        _numpy_table = numpy.array(table, dtype=numpy.int16) if use_numpy() is not None else None
+        _table_day = today
+    return _table
+
+
+class BirthdayColumns:
+    # Birthdays kept column-wise: slot i holds keys[i]'s day code and birth year
+    # in two arrays, so a question about the whole book is one pass over them
+    # (one vectorized NumPy expression when NumPy is installed) rather than a
+    # date computation per record. Freed slots are reused.
+
+    def __init__(self):
+        self.codes = array("H")
+        self.years = array("H")
+        self.keys = []
+        self.slots = {}
+        self.free = []
+
+    def __len__(self):
+        return len(self.slots)
+
+    @classmethod
+    def from_items(cls, items):
+        # items: (key, birthday date or None) pairs.
+        columns = cls()
+        for key, birthday in items:
+            columns.update(key, birthday)
+        return columns
+
+    def update(self, key, birthday):
+        if birthday is None:
+            self.remove(key)
+            return
+        slot = self.slots.get(key)
+        if slot is None:
+            if self.free:
+                slot = self.free.pop()
+                self.keys[slot] = key
+            else:
+                slot = len(self.keys)
+                self.keys.append(key)
+                self.codes.append(NO_BIRTHDAY)
+                self.years.append(0)
+            self.slots[key] = slot
+        self.codes[slot] = day_code(birthday.month, birthday.day)
+        self.years[slot] = birthday.year
+
+    def remove(self, key):
+        slot = self.slots.pop(key, None)
+        if slot is not None:
+            self.codes[slot] = NO_BIRTHDAY
+            self.keys[slot] = None
+            self.free.append(slot)
+
+    def days_left(self, today):
+        # Days to the next birthday per slot, -1 for empty slots.
+        table = days_left_table(today)
+        if use_numpy() is not None:
+            return _numpy_table[numpy.frombuffer(self.codes, dtype=numpy.uint16)]
+        return [table[code] for code in self.codes]
+
+    def nearest(self, today, count=None):
+        # (days_left, key) pairs, nearest birthday first, then by key.
+        if count is not None and count <= 0:
+            return []
+        buckets = [[] for _ in range(367)]
+        keys = self.keys
+        if use_numpy() is not None:
+            days_left = self.days_left(today)
+            wanted = days_left >= 0
+            if count is not None and count < numpy.count_nonzero(wanted):
+                # Only birthdays up to the count-th nearest one can make the cut.
+                wanted &= days_left <= numpy.partition(days_left[wanted], count - 1)[count - 1]
+            slots = numpy.flatnonzero(wanted)
+            for slot, days in zip(slots.tolist(), days_left[slots].tolist()):
+                buckets[days].append(keys[slot])
+        else:
+            for slot, days in enumerate(self.days_left(today)):
+                if days >= 0:
+                    buckets[days].append(keys[slot])
+        found = []
+        for days, bucket in enumerate(buckets):
+            found.extend((days, key) for key in sorted(bucket))
+            if count is not None and len(found) >= count:
+                return found[:count]
+        return found
+
+    def in_month(self, month):
+        # (day, key) pairs of the birthdays in `month`, by day and then key.
+        low, high = day_code(month, 1), day_code(month, 31)
+        keys = self.keys
+        if use_numpy() is not None:
+            codes = numpy.frombuffer(self.codes, dtype=numpy.uint16)
+            slots = numpy.flatnonzero((codes >= low) & (codes <= high)).tolist()
+        else:
+            slots = [slot for slot, code in enumerate(self.codes) if low <= code <= high]
+        return sorted((self.codes[slot] - low + 1, keys[slot]) for slot in slots)
+
+    def aged(self, min_age, max_age, today):
+        # (age, key) pairs of everyone aged min_age..max_age today, youngest first.
+        today_code = day_code(today.month, today.day)
+        keys = self.keys
+        if use_numpy() is not None:
+            codes = numpy.frombuffer(self.codes, dtype=numpy.uint16)
+            ages = today.year - numpy.frombuffer(self.years, dtype=numpy.uint16).astype(numpy.int32) - (codes > today_code)
+            slots = numpy.flatnonzero((codes != NO_BIRTHDAY) & (ages >= min_age) & (ages <= max_age)).tolist()
+            ages = ages.tolist()
+        else:
+            ages = [today.year - year - (code > today_code) for code, year in zip(self.codes, self.years)]
+            slots = [
+                slot for slot, code in enumerate(self.codes)
+                if code != NO_BIRTHDAY and min_age <= ages[slot] <= max_age
+            ]
+        return sorted((ages[slot], keys[slot]) for slot in slots)
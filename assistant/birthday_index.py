@@ -0,0 +1,82 @@
+import calendar
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+
+_today = None
+_tomorrow_at = 0.0
+
+
+def celebration_date(month, day, year):
+    # Feb 29 birthdays are celebrated on Feb 28 in non-leap years.
+    if month == 2 and day == 29 and not calendar.isleap(year):
+        day = 28
+    return date(year, month, day)
+
+
+def current_day():
+    # date.today(), looked up again only once local midnight has passed.
+    global _today, _tomorrow_at
+    if time.time() >= _tomorrow_at:
+        _today = date.today()
+        _tomorrow_at = datetime.combine(_today + timedelta(days=1), datetime.min.time()).timestamp()
+    return _today
+
+
+def next_birthday(birthday, today):
+    upcoming = celebration_date(birthday.month, birthday.day, today.year)
+    if upcoming < today:
+        upcoming = celebration_date(birthday.month, birthday.day, today.year + 1)
+    return upcoming
+
+
+class BirthdayIndex:
+    # One bucket of keys per calendar day, so "who is next" only walks the
+    # requested number of days instead of every contact.
+
+    def __init__(self):
+        self.buckets = defaultdict(set)
+        self.days = {}
+
+    def __len__(self):
+        return len(self.days)
+
+    def update(self, key, birthday):
+        new_day = (birthday.month, birthday.day) if birthday else None
+        old_day = self.days.get(key)
+        if old_day == new_day:
+            return
+        if old_day is not None:
+            self._discard(old_day, key)
+        if new_day is None:
+            self.days.pop(key, None)
+        else:
+            self.days[key] = new_day
+            self.buckets[new_day].add(key)
+
+    def remove(self, key):
+        old_day = self.days.pop(key, None)
+        if old_day is not None:
+            self._discard(old_day, key)
+
+    def _discard(self, day, key):
+        keys = self.buckets[day]
+        keys.discard(key)
+        if not keys:
+            del self.buckets[day]
+
+    def upcoming(self, days, today=None):
+        # Returns (days_left, key) pairs for birthdays within `days` days from today.
+        today = today or date.today()
+        found = []
+        seen = set()
+        for offset in range(min(days, 366) + 1):
+            current = today + timedelta(days=offset)
+            keys = set(self.buckets.get((current.month, current.day), ()))
+            if current.month == 2 and current.day == 28 and not calendar.isleap(current.year):
+                keys |= self.buckets.get((2, 29), set())
+            keys -= seen
+            seen |= keys
+            found.extend((offset, key) for key in sorted(keys))
+        return found
@@ -0,0 +1,252 @@
+import csv
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+
+from atomic_file import atomic_write
+from cl_hw12 import MAX_PHONES, DuplicatePhoneError, Record
+
+
+FORMATS = {".csv": "csv", ".vcf": "vcard", ".vcard": "vcard"}
+CSV_HEADER = ("name", "phones", "birthday")
+CHUNK_ROWS = 10000
+# Files smaller than this are validated in-process; a pool costs more than it saves.
+PARALLEL_MIN_BYTES = 8 << 20
+PHONE_SEPARATORS = str.maketrans("", "", " -().")
+VCARD_ESCAPE = re.compile(r"\\(.)")
+
+
+class ImportStopped(Exception):
+    # Reading the file failed after some contacts went in. They stay in the
+    # book, which bulk() has saved, so the caller can say how far it got.
+    def __init__(self, imported, error):
+        super().__init__(f"stopped after {imported} contacts: {error}")
+        self.imported = imported
+        self.error = error
+
+
+def detect_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported file format: {path}. Use a .csv or .vcf file.")
+    return fmt
+
+
+def parse_phone(text):
+    digits = text.translate(PHONE_SEPARATORS)
+    if len(digits) != 10 or not digits.isascii() or not digits.isdigit():
+        raise ValueError(f"invalid phone number {text!r}")
+    return int(digits)
+
+
+def parse_birthday(text):
+    # Accepts dd.mm.yyyy (as typed in the CLI), dd-mm-yyyy (as saved), and the
+    # yyyy-mm-dd / yyyymmdd forms vCard uses. Returns a date ordinal, 0 when empty.
+    text = text.strip()
+    try:
+        if not text:
+            return 0
+        if len(text) == 10 and text[2] in ".-" and text[5] == text[2]:
+            return date(int(text[6:]), int(text[3:5]), int(text[:2])).toordinal()
+        if len(text) == 10 and text[4] == "-" and text[7] == "-":
+            return date(int(text[:4]), int(text[5:7]), int(text[8:])).toordinal()
+        if len(text) == 8 and text.isdigit():
+            return date(int(text[:4]), int(text[4:6]), int(text[6:])).toordinal()
+    except ValueError:
+        pass
+    raise ValueError(f"invalid birthday {text!r}")
+
+
+def validate_rows(rows):
+    # rows: (line, name, phone strings, birthday string). Returns the valid ones as
+    # (line, name, phone numbers, birthday ordinal) and the rest as (line, name, reason).
+    # Runs in the worker processes, so it only deals in plain tuples.
+    contacts = []
+    rejected = []
+    for line, name, phones, birthday in rows:
+        name = name.strip()
+        try:
+            if not name:
+                raise ValueError("missing name")
+            numbers = [parse_phone(phone) for phone in phones if phone.strip()]
+            if len(numbers) > MAX_PHONES:
+                raise ValueError(f"more than {MAX_PHONES} phone numbers")
+            contacts.append((line, name, numbers, parse_birthday(birthday)))
+        except ValueError as error:
+            rejected.append((line, name, str(error)))
+    return contacts, rejected
+
+
+class LineCountingFile:
+    # Lets read_csv report the line each row ends on.
+    def __init__(self, file):
+        self._file = file
+        self.line_number = 0
+
+    def __iter__(self):
+        for line in self._file:
+            self.line_number += 1
+            yield line
+
+
+def read_csv(file):
+    # One contact per row: name, phones separated by ';', birthday. A header row is skipped.
+    file = LineCountingFile(file)
+    for row in csv.reader(file):
+        if not row or [cell.strip().lower() for cell in row[:2]] == ["name", "phones"]:
+            continue
+        line = file.line_number
+        name = row[0]
+        phones = row[1].split(";") if len(row) > 1 else []
+        birthday = row[2] if len(row) > 2 else ""
+        yield line, name, phones, birthday
+
+
+def unfold(file):
+    # vCard continuation lines start with a space or a tab and belong to the line above.
+    pending = None
+    pending_line = 0
+    for number, line in enumerate(file, 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending_line, pending
+        pending, pending_line = line, number
+    if pending is not None:
+        yield pending_line, pending
+
+
+def vcard_escape(text):
+    return text.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
+
+
+def vcard_unescape(text):
+    return VCARD_ESCAPE.sub(lambda match: "\n" if match.group(1) in "nN" else match.group(1), text)
+
+
+def read_vcards(file):
+    card_line = None
+    for number, line in unfold(file):
+        key, _, value = line.partition(":")
+        prop = key.split(";", 1)[0].rsplit(".", 1)[-1].upper()
+        if prop == "BEGIN" and value.upper() == "VCARD":
+            card_line, name, phones, birthday = number, "", [], ""
+        elif card_line is None:
+            continue
+        elif prop == "FN":
+            name = vcard_unescape(value)
+        elif prop == "N" and not name:
+            name = " ".join(part for part in reversed(value.split(";")[:2]) if part)
+        elif prop == "TEL":
+            phones.append(value[4:] if value.lower().startswith("tel:") else value)
+        elif prop == "BDAY":
+            birthday = value
+        elif prop == "END":
+            yield card_line, name, phones, birthday
+            card_line = None
+
+
+def iter_rows(file, fmt):
+    return read_vcards(file) if fmt == "vcard" else read_csv(file)
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def validated(chunks, workers):
+    # Validated chunks in input order. With workers, at most two chunks per
+    # worker are in flight, so a huge file is never read ahead into memory.
+    if workers <= 1:
+        for chunk in chunks:
+            yield validate_rows(chunk)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(validate_rows, chunk))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def import_contacts(book, path, fmt=None, report_path=None, workers=None, chunk_rows=CHUNK_ROWS):
+    # Streams contacts from a CSV or vCard file into `book`; a contact that is
+    # already there is replaced. Rows that fail validation are written to
+    # `report_path` (next to the file by default). Returns
+    # (imported, rejected, report path or None). An error once contacts went in
+    # is raised as ImportStopped.
+    fmt = fmt or detect_format(path)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if os.path.getsize(path) >= PARALLEL_MIN_BYTES else 1
+    report_path = report_path or os.path.splitext(path)[0] + ".rejected.csv"
+
+    imported = 0
+    rejected = 0
+    report = None
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as file, book.bulk():
+            for contacts, bad_rows in validated(chunked(iter_rows(file, fmt), chunk_rows), workers):
+                for line, name, numbers, birthday in contacts:
+                    try:
+                        book[name] = Record.from_packed(name, numbers, birthday)
+                    except DuplicatePhoneError as error:
+                        bad_rows.append((line, name, str(error)))
+                    else:
+                        imported += 1
+                if bad_rows:
+                    if report is None:
+                        report = open(report_path, "w", encoding="utf-8", newline="")
+                        report_writer = csv.writer(report)
+                        report_writer.writerow(("line", "name", "reason"))
+                    bad_rows.sort()
+                    report_writer.writerows(bad_rows)
+                    rejected += len(bad_rows)
+    except Exception as error:
+        if imported:
+            raise ImportStopped(imported, error) from error
+        raise
+    finally:
+        if report is not None:
+            report.close()
+    return imported, rejected, report_path if rejected else None
+
+
+def export_contacts(book, path, fmt=None, chunk_size=1000):
+    # Writes the whole book in name order; returns the number of contacts written.
+    fmt = fmt or detect_format(path)
+    count = 0
+    with atomic_write(path, newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        if fmt == "csv":
+            writer.writerow(CSV_HEADER)
+        for records in book.iter_batches(chunk_size):
+            for record in records:
+                birthday = record.birthday_date()
+                if fmt == "csv":
+                    writer.writerow((
+                        record.name.value,
+                        ";".join(record.phone_values()),
+                        birthday.strftime("%d.%m.%Y") if birthday else "",
+                    ))
+                else:
+                    name = vcard_escape(record.name.value)
+                    lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{name}", f"N:;{name};;;"]
+                    lines.extend(f"TEL;TYPE=CELL:{phone}" for phone in record.phone_values())
+                    if birthday:
+                        lines.append(f"BDAY:{birthday.isoformat()}")
+                    lines.append("END:VCARD")
+                    file.write("\r\n".join(lines) + "\r\n")
+            count += len(records)
+    return count
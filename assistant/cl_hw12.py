@@ -1,9 +1,41 @@
+import contextlib
+import heapq
 import json
+import os
+import sys
+import threading
+from array import array
 from typing import Optional
 from collections import UserDict
 from datetime import date, datetime
 
+from atomic_file import atomic_write
+from birthday_columns import BirthdayColumns, day_code, days_left_table
+from birthday_index import BirthdayIndex, current_day, next_birthday
+from fuzzy_index import DeletionIndex
+from journal import Journal
+from metrics import timed
+from name_index import SortedNames, name_key
+from paging import Paging
+from phone_index import PhoneIndex
+from json_stream import iter_array_items
+from search_index import NgramIndex, match_rank
+
+# The binary stores (mmap_store, snapshot) keep a contact's phone count in one byte.
+MAX_PHONES = 255
+
+
+class DuplicatePhoneError(ValueError):
+    pass
+
+
+class TooManyPhonesError(ValueError):
+    pass
+
+
 class Field:
+    __slots__ = ("_value",)
+
     def __init__(self, value) -> None:
         self._value = value
 
@@ -23,8 +55,12 @@ class Field:
 
 
 class Name:
+    __slots__ = ("_value",)
+
     def __init__(self, value=None):
-        self._value = value
+        self._value = None
+        if value is not None:
+            self.value = value
 
     @property
     def value(self):
@@ -32,12 +68,16 @@ class Name:
 
     @value.setter
     def value(self, new_value):
-        self._value = str(new_value).capitalize()
+        # Only the first letter is raised: capitalize() would turn "McDonald" into "Mcdonald".
+        new_value = str(new_value)
+        self._value = sys.intern(new_value[:1].upper() + new_value[1:])
 
     def __str__(self):
         return str(self._value)
 
 class Phone:
+    __slots__ = ("_value",)
+
     def __init__(self, value=None):
         self._value = None
         if value:
@@ -53,11 +93,23 @@ class Phone:
             raise ValueError("Invalid phone number format. Please provide a 10-digit number.")
         self._value = value
 
+    @staticmethod
+    def pack(value):
+        return int(Phone(value).value)
+
+    @classmethod
+    def unpack(cls, number):
+        phone = cls()
+        phone._value = "%010d" % number
+        return phone
+
     def __str__(self):
         return self.value
 
 
 class Birthday:
+    __slots__ = ("_value",)
+
     def __init__(self, value=None):
         self._value = None
         if value:
@@ -78,109 +130,593 @@ class Birthday:
 
 
 class Record:
+    # Fields are kept packed: the name as an interned string, phones as unsigned
+    # 64-bit ints and the birthday as a date ordinal (0 when unset). Name, Phone
+    # and Birthday objects are built on access. The printed form is cached
+    # until the record changes or, for records with a birthday, the day does.
+    __slots__ = ("_name", "_phones", "_birthday", "book", "_rendered", "_rendered_on")
+
     def __init__(self, name, phone=None, birthday=None):
-        self.name = Name(name)
-        self.phones = [] if phone is None else [Phone(phone)]
-        self.birthday = birthday
+        self.name = name
+        self._phones = array("Q") if phone is None else array("Q", (Phone.pack(phone),))
+        self._birthday = birthday.value.toordinal() if birthday else 0
+        self.book = None
+
+    @property
+    def name(self):
+        name = Name()
+        name._value = self._name  # already normalized by the setter
+        return name
+
+    @name.setter
+    def name(self, name):
+        self._name = name.value if isinstance(name, Name) else Name(name).value
+        self._rendered = None
+
+    @property
+    def phones(self):
+        return [Phone.unpack(number) for number in self._phones]
+
+    @phones.setter
+    def phones(self, phones):
+        self._phones = array("Q", (int(phone.value) for phone in phones))
+        self._rendered = None
+
+    def phone_values(self):
+        return ["%010d" % number for number in self._phones]
+
+    def phone_numbers(self):
+        return list(self._phones)
+
+    @property
+    def birthday(self):
+        return Birthday(date.fromordinal(self._birthday)) if self._birthday else None
+
+    @birthday.setter
+    def birthday(self, birthday):
+        self._birthday = birthday.value.toordinal() if birthday else 0
+        self._changed("birthday", birthday)
+
+    def birthday_date(self):
+        return date.fromordinal(self._birthday) if self._birthday else None
+
+    @classmethod
+    def restore(cls, name, phones, birthday=None):
+        record = cls(name)
+        record._phones = array("Q", (Phone.pack(phone) for phone in phones))
+        record._birthday = birthday.value.toordinal() if birthday else 0
+        return record
+
+    @classmethod
+    def from_packed(cls, name, numbers, birthday_ordinal=0):
+        # For callers that already validated the phones and converted them to ints.
+        record = cls(name)
+        record._phones = array("Q", numbers)
+        record._birthday = birthday_ordinal
+        return record
+
+    def packed(self):
+        # The inverse of from_packed: plain values that pickle cheaply.
+        return self._name, list(self._phones), self._birthday
+
+    def _claim(self, number):
+        if self.book is not None:
+            self.book._claim_phone(self, number)
+
+    def _changed(self, op, *args):
+        self._rendered = None
+        if self.book is not None:
+            self.book._record_changed(self, op, *args)
+
+    def search_texts(self):
+        return [str(self._name).lower()] + self.phone_values()
 
     def add_phone(self, phone):
         new_phone = Phone(phone)
-        self.phones.append(new_phone)
+        if len(self._phones) >= MAX_PHONES:
+            raise TooManyPhonesError(f"Contact {self.name} already has {MAX_PHONES} phone numbers.")
+        self._claim(int(new_phone.value))
+        self._phones.append(int(new_phone.value))
+        self._changed("add_phone", new_phone)
         return f"/// Contact {self.name}: {new_phone.value} added successfully"
 
     def change_phone(self, old_phone, new_phone):
         old_phone = Phone(old_phone)
         new_phone = Phone(new_phone)
 
-        if old_phone.value in [phone.value for phone in self.phones]:
-            self.phones = [new_phone if phone.value == old_phone.value else phone for phone in self.phones]
+        old_number = int(old_phone.value)
+        if old_number in self._phones:
+            new_number = int(new_phone.value)
+            self._claim(new_number)
+            for position, number in enumerate(self._phones):
+                if number == old_number:
+                    self._phones[position] = new_number
+            self._changed("change_phone", old_phone, new_phone)
             return f"/// Phone number changed from {old_phone.value} to {new_phone.value} for contact {self.name}"
         else:
             return f"/// Phone number {old_phone.value} not found for contact {self.name}"
 
-    def days_to_birthday(self):
-        if self.birthday:
-            today = date.today()
-            next_birthday = date(today.year, self.birthday.value.month, self.birthday.value.day)
-            if next_birthday < today:
-                next_birthday = date(today.year + 1, self.birthday.value.month, self.birthday.value.day)
-            days_left = (next_birthday - today).days
+    def days_to_birthday(self, today=None):
+        if self._birthday:
+            today = today or current_day()
+            days_left = (next_birthday(date.fromordinal(self._birthday), today) - today).days
             return days_left
         else:
             return None
 
+    def _render(self, today, days_table=None):
+        # days_table: days_left_table(today), for callers rendering many records.
+        phones_str = ', '.join(self.phone_values())
+        if not self._birthday:
+            return f"/// {self._name}: {phones_str}, Birthday: N/A."
+        birthday = date.fromordinal(self._birthday)
+        if days_table is None:
+            days_left = (next_birthday(birthday, today) - today).days
+        else:
+            days_left = days_table[day_code(birthday.month, birthday.day)]
+        # Same text as str(Birthday), without going through strftime.
+        return f"/// {self._name}: {phones_str}, Birthday: {birthday.day:02d}-{birthday.month:02d}-{birthday.year}. {days_left} days"
+
     def __str__(self):
-        phones_str = ', '.join(str(phone) for phone in self.phones)
-        birthday_str = str(self.birthday) if self.birthday else "N/A"
-        birthday_days_info = self.days_to_birthday()
+        today = current_day() if self._birthday else None
+        if self._rendered is None or self._rendered_on != today:
+            self._rendered = self._render(today)
+            self._rendered_on = today
+        return self._rendered
+
+
+def render_records(records):
+    # The str() of each record. Stale ones take their days-to-birthday from a
+    # table built once per day instead of calling next_birthday() each.
+    today = current_day()
+    table = days_left_table(today)
+    lines = []
+    for record in records:
+        if not record._birthday:
+            lines.append(str(record))
+            continue
+        if record._rendered is None or record._rendered_on != today:
+            record._rendered = record._render(today, table)
+            record._rendered_on = today
+        lines.append(record._rendered)
+    return lines
+
+
+def birthday_to_str(birthday):
+    return birthday.value.strftime("%d-%m-%Y") if birthday else None
+
+
+def parse_date(date_str):
+    # Fast path for the "dd-mm-yyyy" layout written by save_data.
+    if len(date_str) == 10 and date_str[2] == "-" and date_str[5] == "-":
+        try:
+            return date(int(date_str[6:]), int(date_str[3:5]), int(date_str[:2]))
+        except ValueError:
+            pass
+    return datetime.strptime(date_str, "%d-%m-%Y").date()
+
+
+def birthday_from_str(birthday_str):
+    return Birthday(parse_date(birthday_str)) if birthday_str else None
 
-        if birthday_days_info is not None:
-            return f"/// {self.name}: {phones_str}, Birthday: {birthday_str}. {birthday_days_info} days"
-        else:
-            return f"/// {self.name}: {phones_str}, Birthday: {birthday_str}."
 
+def journal_path(file_path):
+    return os.path.splitext(file_path)[0] + ".journal"
 
-class AddressBook(UserDict):
-    def __init__(self):
+
+def load_folded(file_path):
+    # For tools that read or convert a book file: the journal kept next to it
+    # (the CLI journals by default) is replayed and written back into the file
+    # first, so no change is left behind in it. The book comes back without a
+    # journal, so saving it elsewhere leaves the original untouched.
+    book = AddressBook(file_path, journal=True)
+    if book.journal.count:
+        book.save_data()
+    book.journal.close()
+    book.journal = None
+    return book
+
+
+class AddressBook(Paging, UserDict):
+    def __init__(self, file_path="address_book.json", journal=False, fsync_every=1, compact_every=1000, page_size=10,
+                 unique_phones=False, snapshot_format=None, compression="zlib"):
+        self.search_index = NgramIndex()
+        self.phone_index = PhoneIndex()
+        self.unique_phones = unique_phones
+        self.birthday_index = BirthdayIndex()
+        self.birthday_columns = BirthdayColumns()
+        self.name_order = SortedNames()
+        self.fuzzy_index = None  # built on the first fuzzy search
         super().__init__()
-        self.file_path = "address_book.json"  # File to store the data
+        self.file_path = file_path  # File to store the data
+        self.page_size = page_size
+        # "json" or "binary" (see snapshot.py); None keeps the format the file was loaded in.
+        self.snapshot_format = snapshot_format
+        self.compression = compression  # of binary snapshots
+        self.journal = Journal(journal_path(file_path), fsync_every) if journal else None
+        self.compact_every = compact_every
+        self._replaying = False
+        self.lock = threading.RLock()  # held by callers around commands, and by save_data while it copies
+        self._saving = threading.RLock()  # one save writing at a time; never wait for the lock while holding it
+        self._compacting = None  # the background compaction thread, see compact()
+        self._version = 0  # bumped by every mutation
+        self._saved_version = 0
+        self._keys_version = 0  # bumped when contacts are added or deleted
 
         self.load_data()
 
     def add_record(self, name, phone, birthday=None):
         record = Record(name, phone, birthday)
+        self[name] = record
+
+    def __setitem__(self, name, record):
+        # Contacts are keyed by the name_key of their display name, so "john" and
+        # "John" are one contact and the record can always find its own key.
+        name = name_key(record.name.value)
+        old_record = self.data.get(name)
+        if self.unique_phones:
+            for number in record.phone_numbers():
+                self._check_phone(name, number)
+        if old_record is None:
+            self._keys_version += 1
+            self.name_order.add(name, defer=self._replaying)
+            if self.fuzzy_index is not None:
+                self.fuzzy_index.add(name, name)
+        else:
+            for number in old_record.phone_numbers():
+                self.phone_index.discard(number, name)
+            if old_record is not record:
+                old_record.book = None
+        for number in record.phone_numbers():
+            self.phone_index.add(number, name)
         self.data[name] = record
+        record.book = self
+        self.search_index.update(name, record.search_texts())
+        birthday = record.birthday_date()
+        self.birthday_index.update(name, birthday)
+        self.birthday_columns.update(name, birthday)
+        self._version += 1
+        if self._logging:
+            self._log({
+                "op": "add",
+                "name": record.name.value,
+                "phones": record.phone_values(),
+                "birthday": birthday_to_str(record.birthday),
+            })
+
+    def __delitem__(self, name):
+        name = name_key(name)
+        record = self.data.pop(name)
+        self._keys_version += 1
+        record.book = None
+        for number in record.phone_numbers():
+            self.phone_index.discard(number, name)
+        self.search_index.remove(name)
+        self.birthday_index.remove(name)
+        self.birthday_columns.remove(name)
+        self.name_order.remove(name)
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.remove(name)
+        self._version += 1
+        self._log({"op": "delete", "name": record.name.value})
+
+    def _record_changed(self, record, op, *args):
+        name = name_key(record.name.value)
+        if self.data.get(name) is not record:
+            return
+        if op == "birthday":
+            birthday = record.birthday_date()
+            self.birthday_index.update(name, birthday)
+            self.birthday_columns.update(name, birthday)
+        else:
+            self.search_index.update(name, record.search_texts())
+        if op == "add_phone":
+            self.phone_index.add(int(args[0].value), name)
+        elif op == "change_phone":
+            self.phone_index.discard(int(args[0].value), name)
+            self.phone_index.add(int(args[1].value), name)
+        self._version += 1
+        if not self._logging:
+            return
+
+        # Entries hold the new value rather than the edit, so replaying one that
+        # the snapshot already covers changes nothing.
+        name = record.name.value
+        if op == "birthday":
+            self._log({"op": op, "name": name, "birthday": birthday_to_str(args[0])})
+        else:
+            self._log({"op": "phones", "name": name, "phones": record.phone_values()})
+
+    def _check_phone(self, name, number):
+        owner = self.phone_index.other_owner(number, name)
+        if owner is not None:
+            owner = self.data[owner].name.value
+            raise DuplicatePhoneError(f"Phone number {number:010d} already belongs to contact {owner}.")
+
+    def _claim_phone(self, record, number):
+        name = name_key(record.name.value)
+        if self.unique_phones and self.data.get(name) is record:
+            self._check_phone(name, number)
+
+    @property
+    def dirty(self):
+        return self._version != self._saved_version
+
+    @property
+    def journaled(self):
+        return self.journal is not None
+
+    @property
+    def _logging(self):
+        return self.journal is not None and not self._replaying
+
+    def _log(self, entry):
+        if not self._logging:
+            return
+        self.journal.append(entry)
+        if self.journal.count >= self.compact_every:
+            self.compact()
+
+    def _apply(self, entry):
+        # A crash between writing a snapshot and trimming the journal replays
+        # entries the snapshot already holds, so applying one twice must be
+        # harmless. Entries about a contact that is gone are skipped.
+        op = entry["op"]
+        name = entry["name"]
+        if op == "add":
+            self[name] = Record.restore(name, entry["phones"], birthday_from_str(entry["birthday"]))
+            return
+        if op == "delete":
+            if name in self:
+                del self[name]
+            return
+        record = self.get(name)
+        if record is None:
+            return
+        if op == "phones":
+            self[name] = Record.restore(name, entry["phones"], record.birthday)
+        elif op == "birthday":
+            record.birthday = birthday_from_str(entry["birthday"])
+        elif op == "add_phone":  # journals written before "phones"
+            if entry["phone"] not in record.phone_values():
+                record.add_phone(entry["phone"])
+        elif op == "change_phone":
+            record.change_phone(entry["old"], entry["new"])
+
+    @contextlib.contextmanager
+    def bulk(self):
+        # Mass inserts take the shortcuts loading does: nothing is journaled and
+        # the name order is sorted once at the end. The snapshot written
+        # afterwards makes them durable, also when the body fails partway:
+        # whatever went in is in the book, so it has to be on disk too.
+        with self.lock:
+            self._replaying = True
+            try:
+                yield self
+            finally:
+                self._replaying = False
+                self.name_order.flush()
+                self.save_data()
+
+    def import_contacts(self, path, **options):
+        from bulk_io import import_contacts
+        return import_contacts(self, path, **options)
+
+    def export_contacts(self, path, **options):
+        from bulk_io import export_contacts
+        return export_contacts(self, path, **options)
+
+    def compact(self):
+        # Runs on a background thread, so the command whose entry filled the
+        # journal doesn't pay for the snapshot, and neither do the server's
+        # readers waiting behind that command. Only copying the contacts
+        # takes the book lock. A save already under way empties the journal
+        # as well, so don't wait for it.
+        if self._compacting is None or not self._compacting.is_alive():
+            self._compacting = threading.Thread(
+                target=self.save_data, kwargs={"wait": False}, name="compact", daemon=True
+            )
+            self._compacting.start()
+
+    def close(self):
+        # Folds the journal into the file on the way out, so the file other
+        # tools read is current.
+        if self.journal is None or self.journal.count:
+            self.save_data()
+        if self.journal is not None:
+            self.journal.close()
 
     def get(self, name: str) -> Optional[Record]:
-        return self.data.get(name)
+        return self.data.get(name_key(name))
+
+    def __getitem__(self, name):
+        return self.data[name_key(name)]
+
+    def __contains__(self, name):
+        return isinstance(name, str) and name_key(name) in self.data
+
+    def complete(self, prefix, limit=None):
+        # Names starting with `prefix`, ignoring case, in name order.
+        return [self.data[key].name.value for key in self.name_order.prefixed(name_key(prefix), limit)]
+
+    def search(self, term):
+        return [self.data[name] for name in self.search_index.search(term.lower())]
+
+    def ranked(self, term, count=None):
+        # The `count` best (rank, name) matches for query(), all of them when count is None.
+        term = term.lower()
+        texts = self.search_index.texts
+        ranked = (
+            (match_rank(term, texts[name][0], texts[name][1:]), name)
+            for name in self.search_index.candidates(term)
+        )
+        return sorted(ranked) if count is None else heapq.nsmallest(count, ranked)
+
+    def query(self, term, limit=None, offset=0):
+        # Yields matches best first: exact phone, name prefix, phone prefix, name infix,
+        # phone infix, then by name. With a limit only offset + limit matches are kept.
+        top = self.ranked(term, None if limit is None else offset + limit)
+        for _, name in top[offset:]:
+            yield self.data[name]
+
+    def fuzzy_search(self, term, max_distance=2, limit=None):
+        # (distance, record) pairs ranked by edit distance to the name, then by name.
+        fuzzy_index = self.fuzzy_index
+        if fuzzy_index is None:
+            # Concurrent readers (the server runs searches side by side) wait
+            # for one build and only ever see the finished index.
+            with self.lock:
+                fuzzy_index = self.fuzzy_index
+                if fuzzy_index is None:
+                    fuzzy_index = DeletionIndex(max(max_distance, 2))
+                    for name in self.data:
+                        fuzzy_index.add(name, name)
+                    self.fuzzy_index = fuzzy_index
+        if max_distance > fuzzy_index.max_distance:
+            raise ValueError(f"max_distance is limited to {fuzzy_index.max_distance}")
+        found = fuzzy_index.search(name_key(term), max_distance)[:limit]
+        return [(distance, self.data[name]) for distance, name in found]
+
+    def whois(self, phone):
+        return [self.data[name] for name in self.phone_index.owners_of(Phone.pack(phone))]
+
+    def upcoming_birthdays(self, days, today=None):
+        return [(days_left, self.data[name]) for days_left, name in self.birthday_index.upcoming(days, today)]
+
+    def nearest_birthdays(self, count=None, today=None):
+        # (days_left, record) pairs for everyone with a birthday, nearest first.
+        found = self.birthday_columns.nearest(today or current_day(), count)
+        return [(days_left, self.data[name]) for days_left, name in found]
+
+    def birthdays_in_month(self, month):
+        return [self.data[name] for _, name in self.birthday_columns.in_month(month)]
+
+    def contacts_aged(self, min_age, max_age, today=None):
+        # (age, record) pairs, youngest first.
+        found = self.birthday_columns.aged(min_age, max_age, today or current_day())
+        return [(age, self.data[name]) for age, name in found]
 
     def get_all_contacts(self):
         return list(self.data.values())
 
-    def __iter__(self):
-        return AddressBookIterator(self.data.values())
-
-    def save_data(self):
-        with open(self.file_path, "w") as file:
-            data_to_save = {
-                "contacts": [
-                    {
-                        "name": contact.name.value,
-                        "phones": [phone.value for phone in contact.phones],
-                        "birthday": contact.birthday.value.strftime("%d-%m-%Y") if contact.birthday else None,
-                    }
-                    for contact in self.get_all_contacts()
-                ]
-            }
-            json.dump(data_to_save, file, indent=2)
+    def get_contacts(self, start, stop):
+        return [self.data[name] for name in self.name_order.slice(start, stop)]
+
+    def page_after(self, cursor, page_size=None):
+        # Keyset pagination: the page of names following `cursor` (None for the first page)
+        # and the cursor of the next page, which stays valid while the book changes.
+        names = self.name_order.after(name_key(cursor) if cursor is not None else None, page_size or self.page_size)
+        records = [self.data[name] for name in names]
+        next_cursor = records[-1].name.value if records else None
+        return records, next_cursor
+
 
+    def __iter__(self):
+        return AddressBookIterator(self)
+
+    # Iterating the book yields records, so the mapping views go to the dict directly.
+    def keys(self):
+        return self.data.keys()
+
+    def values(self):
+        return self.data.values()
+
+    def items(self):
+        return self.data.items()
+
+    @timed("save_data")
+    def save_data(self, wait=True):
+        # Only taking the list of records needs the lock; reading them and
+        # writing and syncing the file run while other threads keep editing the
+        # book. So the snapshot may already hold changes logged after `mark`,
+        # which is fine: replaying those entries again is harmless (see
+        # _apply). The write holds _saving but never the lock, so a thread
+        # holding the lock can always wait for another thread's save to finish.
+        # With wait=False the save is dropped if another one is under way.
+        with self.lock:
+            version = self._version
+            mark = self.journal.mark() if self.journal is not None else None
+            records = list(self.data.values())
+        if not self._saving.acquire(blocking=wait):
+            return
+        try:
+            if version < self._saved_version:
+                return  # a newer copy was saved while this one waited
+            if self.snapshot_format == "binary":
+                from snapshot import write_snapshot
+                contacts = [(record._name, record._phones.tolist(), record._birthday) for record in records]
+                write_snapshot(self.file_path, contacts, self.compression)
+            else:
+                contacts = [(record._name, record.phone_values(), record.birthday_date()) for record in records]
+                self._write_json(contacts)
+            if self.journal is not None:
+                self.journal.discard(mark)
+            self._saved_version = version
+        finally:
+            self._saving.release()
+
+    def _write_json(self, contacts):
+        # One contact per line: still readable, and each line goes through the
+        # C encoder, which json.dump(indent=...) can't use.
+        with atomic_write(self.file_path) as file:
+            file.write('{\n  "contacts": [')
+            separator = "\n    "
+            for name, phones, birthday in contacts:
+                file.write(separator)
+                file.write(json.dumps({
+                    "name": name,
+                    "phones": phones,
+                    "birthday": birthday.strftime("%d-%m-%Y") if birthday else None,
+                }))
+                separator = ",\n    "
+            file.write("\n  ]\n}\n")
+
+    @timed("load_data")
     def load_data(self):
+        self._replaying = True
+        try:
+            self._load_snapshot()
+            self._saved_version = self._version
+            if self.journal is not None:
+                for entry in self.journal.replay():
+                    self._apply(entry)
+        finally:
+            self._replaying = False
+            self.name_order.flush()
+
+    def _load_snapshot(self):
+        from snapshot import is_snapshot, read_snapshot
+
+        if is_snapshot(self.file_path):
+            if self.snapshot_format is None:
+                self.snapshot_format = "binary"
+            for name, phones, birthday_ordinal in read_snapshot(self.file_path):
+                self[name] = Record.from_packed(name, phones, birthday_ordinal)
+            return
         try:
             with open(self.file_path, "r") as file:
-                data = json.load(file)
-                for contact_data in data.get("contacts", []):
+                for contact_data in iter_array_items(file, "contacts"):
                     name = contact_data.get("name")
-                    phones = contact_data.get("phones", [])
                     birthday_str = contact_data.get("birthday")
-                    birthday = Birthday(datetime.strptime(birthday_str, "%d-%m-%Y").date()) if birthday_str else None
-                    self.add_record(name, phones[0], birthday)
-                    for phone in phones[1:]:
-                        self.get(name).add_phone(phone)
+                    birthday = Birthday(parse_date(birthday_str)) if birthday_str else None
+                    self[name] = Record.restore(name, contact_data.get("phones", []), birthday)
         except FileNotFoundError:
             pass
 
 
 class AddressBookIterator:
-    def __init__(self, records):
-        self.records = records
-        self.index = 0
+    # Walks the records in insertion order without copying them. Adding or
+    # deleting contacts meanwhile makes the next step raise RuntimeError, like a
+    # dict does; editing records is fine. iter_batches() keeps going through changes.
+    def __init__(self, book):
+        self.book = book
+        self.records = iter(book.data.values())
+        self.version = book._keys_version
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        if self.index < len(self.records):
-            record = self.records[self.index]
-            self.index += 1
-            return record
-        raise StopIteration
+        if self.book._keys_version != self.version:
+            raise RuntimeError("Address book changed during iteration")
+        return next(self.records)
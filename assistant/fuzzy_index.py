@@ -0,0 +1,142 @@
+def levenshtein(a, b, limit=None):
+    # Edit distance between a and b. With `limit`, gives up early and returns
+    # limit + 1 as soon as the distance is known to exceed it.
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    if not b:
+        return len(a)
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        left = i
+        for j, char_b in enumerate(b, 1):
+            cost = previous[j - 1] if char_a == char_b else previous[j - 1] + 1
+            up = previous[j] + 1
+            if up < cost:
+                cost = up
+            if left + 1 < cost:
+                cost = left + 1
+            current.append(cost)
+            left = cost
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def fuzzy_scan(keys, term, max_distance):
+    # Brute-force fallback for backends without a DeletionIndex: (distance, key) pairs, best first.
+    term = term.lower()
+    found = []
+    for key in keys:
+        distance = levenshtein(term, key.lower(), max_distance)
+        if distance <= max_distance:
+            found.append((distance, key))
+    found.sort()
+    return found
+
+
+def deletions(word, max_distance):
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+class DeletionIndex:
+    # SymSpell-style symmetric delete index over lowercased names. Every name is
+    # filed under all strings obtained by deleting up to `max_distance` characters
+    # from its first `prefix_length` characters. A query generates the same
+    # deletions of itself, so candidates come from a handful of dict lookups and
+    # only those are checked with a real edit distance.
+
+    def __init__(self, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.deletes = {}  # deletion -> term, or a set of terms when shared
+        self.keys = {}  # term -> key, or a set of keys when shared
+        self.terms = {}  # key -> term
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _variants(self, term, max_distance):
+        return deletions(term[:self.prefix_length], max_distance)
+
+    def add(self, key, text):
+        term = text.lower()
+        if self.terms.get(key) == term:
+            return
+        self.remove(key)
+        self.terms[key] = term
+
+        keys = self.keys.get(term)
+        if keys is not None:
+            if isinstance(keys, set):
+                keys.add(key)
+            else:
+                self.keys[term] = {keys, key}
+            return
+        self.keys[term] = key
+        for variant in self._variants(term, self.max_distance):
+            current = self.deletes.get(variant)
+            if current is None:
+                self.deletes[variant] = term
+            elif isinstance(current, set):
+                current.add(term)
+            else:
+                self.deletes[variant] = {current, term}
+
+    def remove(self, key):
+        term = self.terms.pop(key, None)
+        if term is None:
+            return
+        keys = self.keys[term]
+        if isinstance(keys, set):
+            keys.discard(key)
+            if len(keys) == 1:
+                self.keys[term] = keys.pop()
+            return
+        del self.keys[term]
+        for variant in self._variants(term, self.max_distance):
+            current = self.deletes.get(variant)
+            if isinstance(current, set):
+                current.discard(term)
+                if len(current) == 1:
+                    self.deletes[variant] = current.pop()
+            elif current == term:
+                del self.deletes[variant]
+
+    def search(self, text, max_distance):
+        # (distance, key) pairs within max_distance, closest first. Distances above
+        # the index's max_distance are clamped to it.
+        max_distance = min(max_distance, self.max_distance)
+        term = text.lower()
+        candidates = set()
+        for variant in self._variants(term, max_distance):
+            current = self.deletes.get(variant)
+            if current is None:
+                continue
+            if isinstance(current, set):
+                candidates |= current
+            else:
+                candidates.add(current)
+
+        found = []
+        for candidate in candidates:
+            distance = levenshtein(term, candidate, max_distance)
+            if distance <= max_distance:
+                keys = self.keys[candidate]
+                if isinstance(keys, set):
+                    found.extend((distance, key) for key in keys)
+                else:
+                    found.append((distance, keys))
+        found.sort()
+        return found
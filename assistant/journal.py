@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+
+from atomic_file import atomic_write
+
+
+class Journal:
+    # Append-only log of address book mutations, one JSON object per line.
+    # Entries are flushed right away and fsync'ed every `fsync_every` appends.
+    # Marks count every byte ever appended, so a mark stays valid after
+    # discard() drops the start of the file.
+
+    def __init__(self, path, fsync_every=1):
+        self.path = path
+        self.fsync_every = max(1, fsync_every)
+        self.count = 0
+        self._pending = 0
+        self._file = None
+        self._discarded = 0  # bytes dropped from the start of the file so far
+        self._lock = threading.RLock()  # discard() may run while another thread appends
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def append(self, entry):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            file = self._open()
+            file.write(line)
+            file.flush()
+            self.count += 1
+            self._pending += 1
+            if self._pending >= self.fsync_every:
+                self.sync()
+
+    def sync(self):
+        with self._lock:
+            if self._file is not None and self._pending:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def replay(self):
+        self.count = 0
+        valid_size = 0
+        try:
+            with open(self.path, "rb") as file:
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break  # torn write from a crash, the entry never completed
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    valid_size += len(line)
+                    self.count += 1
+                    yield entry
+                torn = valid_size != file.tell()
+        except FileNotFoundError:
+            return
+        if torn:
+            with open(self.path, "r+b") as file:
+                file.truncate(valid_size)
+
+    def mark(self):
+        # Size of the log so far; pass it to discard() once a snapshot covering
+        # these entries is safely written.
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                return self._discarded + os.fstat(self._file.fileno()).st_size
+            try:
+                return self._discarded + os.path.getsize(self.path)
+            except FileNotFoundError:
+                return self._discarded
+
+    def discard(self, mark):
+        # Drops the entries before `mark` and keeps the ones appended since.
+        with self._lock:
+            if mark <= self._discarded:
+                return
+            self.close()
+            try:
+                with open(self.path, "rb") as file:
+                    file.seek(mark - self._discarded)
+                    tail = file.read()
+            except FileNotFoundError:
+                tail = b""
+            with atomic_write(self.path, "wb") as file:
+                file.write(tail)
+            self._discarded = mark
+            self.count = tail.count(b"\n")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self.sync()
+                self._file.close()
+                self._file = None
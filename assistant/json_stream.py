@@ -0,0 +1,51 @@
+import json
+import re
+
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[\s,]*")
+
+
+def iter_array_items(file, key, chunk_size=CHUNK_SIZE):
+    # Yields the items of the top-level `key` array one at a time, so only the
+    # current chunk and the item being decoded are ever held in memory.
+    opening = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    buffer = ""
+    while True:
+        match = opening.search(buffer)
+        if match:
+            break
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        buffer = buffer[-len(key) - 16:] + chunk
+
+    position = match.end()
+    eof = False
+    while True:
+        position = _whitespace.match(buffer, position).end()
+        if position < len(buffer):
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                # An item running up to the end of the buffer may still be cut short.
+                if end < len(buffer) or eof:
+                    yield item
+                    position = end
+                    if position > chunk_size:
+                        buffer = buffer[position:]
+                        position = 0
+                    continue
+        elif eof:
+            raise ValueError(f"Unterminated \"{key}\" array")
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
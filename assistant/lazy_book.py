@@ -0,0 +1,60 @@
+import threading
+
+
+class LazyAddressBook:
+    # Stands in for an address book while `opener` builds it on a background
+    # thread, so the CLI can prompt before the file is read. Anything that
+    # touches the book waits for the load, and a failed load raises its error
+    # there.
+
+    def __init__(self, opener):
+        self._book = None
+        self._error = None
+        self._loaded = threading.Event()
+        self._thread = threading.Thread(target=self._load, args=(opener,), name="load", daemon=True)
+        self._thread.start()
+
+    def _load(self, opener):
+        try:
+            self._book = opener()
+        except BaseException as error:
+            self._error = error
+        finally:
+            self._loaded.set()
+
+    @property
+    def loaded(self):
+        return self._loaded.is_set()
+
+    def wait(self):
+        self._loaded.wait()
+        if self._error is not None:
+            raise self._error
+        return self._book
+
+    def __getattr__(self, name):
+        return getattr(self.wait(), name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.wait(), name, value)
+
+    def __len__(self):
+        return len(self.wait())
+
+    def __contains__(self, name):
+        return name in self.wait()
+
+    def __iter__(self):
+        return iter(self.wait())
+
+    def __getitem__(self, name):
+        return self.wait()[name]
+
+    def __setitem__(self, name, record):
+        self.wait()[name] = record
+
+    def __delitem__(self, name):
+        del self.wait()[name]
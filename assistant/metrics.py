@@ -0,0 +1,155 @@
+import functools
+import json
+import threading
+import time
+from collections import Counter
+
+
+# Upper bounds in seconds, Prometheus style; the last bucket catches everything.
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        for position, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[position] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation.
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target and seen:
+                return bound
+        return 0.0
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {format_bound(bound): total for bound, total in self.cumulative()},
+        }
+
+
+def format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class Metrics:
+    # Per-command call counts, latencies and errors by exception type, plus
+    # timings of named operations such as load_data/save_data. Commands are
+    # only recorded once `enabled` is set; operations always are, they are rare
+    # and slow enough for two clock reads not to matter.
+
+    def __init__(self):
+        self.enabled = False
+        self.commands = {}
+        self.errors = {}
+        self.operations = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.commands.clear()
+            self.errors.clear()
+            self.operations.clear()
+
+    def observe(self, command, seconds, error=None):
+        with self._lock:
+            histogram = self.commands.get(command)
+            if histogram is None:
+                histogram = self.commands[command] = Histogram()
+            histogram.observe(seconds)
+            if error is not None:
+                self.errors.setdefault(command, Counter())[type(error).__name__] += 1
+
+    def observe_operation(self, operation, seconds):
+        with self._lock:
+            histogram = self.operations.get(operation)
+            if histogram is None:
+                histogram = self.operations[operation] = Histogram()
+            histogram.observe(seconds)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "commands": {
+                    command: dict(histogram.to_dict(), errors=dict(self.errors.get(command, {})))
+                    for command, histogram in sorted(self.commands.items())
+                },
+                "operations": {
+                    operation: histogram.to_dict()
+                    for operation, histogram in sorted(self.operations.items())
+                },
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            for metric, label, histograms, help_text in (
+                ("assistant_command_seconds", "command", self.commands, "Command handler latency."),
+                ("assistant_operation_seconds", "operation", self.operations, "Load and save latency."),
+            ):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for name, histogram in sorted(histograms.items()):
+                    for bound, total in histogram.cumulative():
+                        lines.append(f'{metric}_bucket{{{label}="{name}",le="{format_bound(bound)}"}} {total}')
+                    lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.sum!r}')
+                    lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+            lines.append("# HELP assistant_command_errors_total Command errors by exception type.")
+            lines.append("# TYPE assistant_command_errors_total counter")
+            for command, errors in sorted(self.errors.items()):
+                for error_type, count in sorted(errors.items()):
+                    lines.append(f'assistant_command_errors_total{{command="{command}",type="{error_type}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        # Plain-text table for the stats command.
+        lines = ["/// command        calls  errors   mean ms    p50 ms    p99 ms"]
+        with self._lock:
+            rows = [(name, histogram, sum(self.errors.get(name, {}).values())) for name, histogram in sorted(self.commands.items())]
+            rows += [(name, histogram, 0) for name, histogram in sorted(self.operations.items())]
+            for name, histogram, errors in rows:
+                mean = histogram.sum / histogram.count * 1000 if histogram.count else 0.0
+                lines.append(
+                    f"/// {name:<14} {histogram.count:>6} {errors:>7} {mean:>9.3f} "
+                    f"{histogram.quantile(0.5) * 1000:>9.3f} {histogram.quantile(0.99) * 1000:>9.3f}"
+                )
+        return "\n".join(lines)
+
+
+metrics = Metrics()
+
+
+def timed(operation):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe_operation(operation, time.perf_counter() - started)
+        return wrapper
+    return decorator
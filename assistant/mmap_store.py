@@ -0,0 +1,410 @@
+import contextlib
+import heapq
+import mmap
+import os
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from itertools import islice
+from datetime import date
+from typing import Optional
+
+from atomic_file import sync_directory
+from birthday_columns import BirthdayColumns
+from birthday_index import current_day, next_birthday
+from cl_hw12 import AddressBook, Birthday, Name, Phone, Record, load_folded
+from fuzzy_index import fuzzy_scan
+from metrics import timed
+from name_index import name_key
+from paging import Paging
+from search_index import match_rank
+
+
+MAGIC = b"ABMM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQ")  # magic, version, reserved, count, index offset
+NAME_LEN = struct.Struct("<H")
+PHONE_COUNT = struct.Struct("<B")
+PHONE = struct.Struct("<Q")
+BIRTHDAY = struct.Struct("<i")
+OFFSET = struct.Struct("<Q")
+
+
+def pack_record(name, phones, birthday_ordinal=0):
+    name_bytes = name.encode("utf-8")
+    parts = [NAME_LEN.pack(len(name_bytes)), name_bytes, PHONE_COUNT.pack(len(phones))]
+    parts.extend(PHONE.pack(int(phone)) for phone in phones)
+    parts.append(BIRTHDAY.pack(birthday_ordinal))
+    return b"".join(parts)
+
+
+def unpack_name(buffer, offset):
+    (name_len,) = NAME_LEN.unpack_from(buffer, offset)
+    start = offset + NAME_LEN.size
+    return bytes(buffer[start:start + name_len]).decode("utf-8"), start + name_len
+
+
+def unpack_record(buffer, offset):
+    name, offset = unpack_name(buffer, offset)
+    (phone_count,) = PHONE_COUNT.unpack_from(buffer, offset)
+    offset += PHONE_COUNT.size
+    phones = ["%010d" % PHONE.unpack_from(buffer, offset + i * PHONE.size)[0] for i in range(phone_count)]
+    offset += phone_count * PHONE.size
+    (birthday_ordinal,) = BIRTHDAY.unpack_from(buffer, offset)
+    return name, phones, birthday_ordinal, offset + BIRTHDAY.size
+
+
+def record_fields(record):
+    birthday_ordinal = record.birthday.value.toordinal() if record.birthday else 0
+    return record.name.value, record.phone_values(), birthday_ordinal
+
+
+def build_record(name, phones, birthday_ordinal):
+    birthday = Birthday(date.fromordinal(birthday_ordinal)) if birthday_ordinal else None
+    return Record.restore(name, phones, birthday)
+
+
+def write_store(path, items):
+    # `items` yields (name, packed record bytes) in any order; the index is sorted by name.
+    entries = []
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        offset = HEADER.size
+        for name, packed in items:
+            entries.append((name, offset))
+            file.write(packed)
+            offset += len(packed)
+        entries.sort()
+        for _, record_offset in entries:
+            file.write(OFFSET.pack(record_offset))
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(entries), offset))
+        file.flush()
+        os.fsync(file.fileno())
+
+
+class MappedAddressBook(Paging):
+    # AddressBook backed by a memory-mapped file: records stay as packed bytes on
+    # disk and are only hydrated into Record objects when they are touched.
+    # Hydrated records are kept in an LRU cache; modified and new records live in
+    # an in-memory overlay until save_data merges them into a new file.
+
+    def __init__(self, file_path="address_book.abm", cache_size=1024, page_size=10):
+        self.file_path = file_path
+        self.cache_size = cache_size
+        self.page_size = page_size
+        self._file = None
+        self._map = None
+        self._count = 0
+        self._index_offset = 0
+        self._cache = OrderedDict()
+        self._changed = {}
+        self._added = set()
+        self._deleted = set()
+        self.lock = threading.RLock()
+
+        self.load_data()
+
+    @timed("load_data")
+    def load_data(self):
+        self._close_map()
+        self._cache.clear()
+        self._changed.clear()
+        self._added.clear()
+        self._deleted.clear()
+        self._count = 0
+        if not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0:
+            return
+
+        self._file = open(self.file_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self._count, self._index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._close_map()
+            raise ValueError(f"{self.file_path} is not an address book store")
+
+    def _close_map(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map = None
+        self._file = None
+
+    def _record_offset(self, position):
+        return OFFSET.unpack_from(self._map, self._index_offset + position * OFFSET.size)[0]
+
+    def _find_offset(self, name):
+        target = name.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset = self._record_offset(middle)
+            (name_len,) = NAME_LEN.unpack_from(self._map, offset)
+            start = offset + NAME_LEN.size
+            current = self._map[start:start + name_len]
+            if current == target:
+                return offset
+            if current < target:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _in_file(self, name):
+        return self._map is not None and self._find_offset(name) is not None
+
+    def _hydrate(self, name):
+        record = self._cache.get(name)
+        if record is not None:
+            self._cache.move_to_end(name)
+            return record
+
+        offset = self._find_offset(name) if self._map is not None else None
+        if offset is None:
+            return None
+        record = build_record(*unpack_record(self._map, offset)[:3])
+        record.book = self
+        self._cache[name] = record
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return record
+
+    def get(self, name: str) -> Optional[Record]:
+        # Everything is keyed by the name as Name normalizes it, which is what the file holds.
+        name = Name(name).value
+        if name in self._deleted:
+            return None
+        record = self._changed.get(name)
+        if record is not None:
+            return record
+        return self._hydrate(name)
+
+    def __getitem__(self, name):
+        record = self.get(name)
+        if record is None:
+            raise KeyError(name)
+        return record
+
+    def __contains__(self, name):
+        name = Name(name).value
+        if name in self._deleted:
+            return False
+        return name in self._changed or name in self._cache or self._in_file(name)
+
+    def __len__(self):
+        return self._count - len(self._deleted) + len(self._added)
+
+    def add_record(self, name, phone, birthday=None):
+        self[name] = Record(name, phone, birthday)
+
+    def __setitem__(self, name, record):
+        name = record.name.value
+        if name in self._deleted:
+            self._deleted.discard(name)
+        elif name not in self._changed and not self._in_file(name):
+            self._added.add(name)
+        self._cache.pop(name, None)
+        record.book = self
+        self._changed[name] = record
+
+    def __delitem__(self, name):
+        name = Name(name).value
+        if name not in self:
+            raise KeyError(name)
+        self._cache.pop(name, None)
+        self._changed.pop(name, None)
+        if name in self._added:
+            self._added.discard(name)
+        else:
+            self._deleted.add(name)
+
+    def _claim_phone(self, record, number):
+        pass  # unique phone numbers are only enforced by the in-memory AddressBook
+
+    def _record_changed(self, record, op, *args):
+        name = record.name.value
+        if name not in self._changed and name not in self._deleted:
+            self._cache.pop(name, None)
+            self._changed[name] = record
+
+    def _name_at(self, position):
+        return unpack_name(self._map, self._record_offset(position))[0]
+
+    def _position_after(self, cursor):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_at(middle) <= cursor:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _iter_file(self, after=None):
+        # Yields (name, offset) of live on-disk records in name order.
+        if self._map is None:
+            return
+        start = self._position_after(after) if after is not None else 0
+        for position in range(start, self._count):
+            offset = self._record_offset(position)
+            name, _ = unpack_name(self._map, offset)
+            if name not in self._deleted and name not in self._changed:
+                yield name, offset
+
+    def iter_names(self, after=None):
+        file_names = (name for name, _ in self._iter_file(after))
+        changed_names = sorted(name for name in self._changed if after is None or name > after)
+        return heapq.merge(file_names, changed_names)
+
+    def __iter__(self):
+        return (self.get(name) for name in self.iter_names())
+
+    def complete(self, prefix, limit=None):
+        # The file is sorted by exact name, not by name_key, so this is a scan over the names.
+        prefix = name_key(prefix)
+        return list(islice((name for name in self.iter_names() if name_key(name).startswith(prefix)), limit))
+
+    def get_all_contacts(self):
+        return list(self)
+
+    def get_contacts(self, start, stop):
+        return [self.get(name) for name in list(islice(self.iter_names(), start, stop))]
+
+    def page_after(self, cursor, page_size=None):
+        cursor = Name(cursor).value if cursor is not None else None  # as stored, like get()
+        names = list(islice(self.iter_names(cursor), page_size or self.page_size))
+        next_cursor = names[-1] if names else None
+        return [self.get(name) for name in names], next_cursor
+
+
+    def search(self, term):
+        term = term.lower()
+        names = []
+        for name, offset in self._iter_file():
+            _, phones, _, _ = unpack_record(self._map, offset)
+            if term in name.lower() or any(term in phone for phone in phones):
+                names.append(name)
+        for name, record in self._changed.items():
+            if any(term in text for text in record.search_texts()):
+                names.append(name)
+        return [self.get(name) for name in sorted(names)]
+
+    def _ranked(self, term):
+        for name, offset in self._iter_file():
+            _, phones, _, _ = unpack_record(self._map, offset)
+            rank = match_rank(term, name.lower(), phones)
+            if rank is not None:
+                yield rank, name
+        for name, record in self._changed.items():
+            texts = record.search_texts()
+            rank = match_rank(term, texts[0], texts[1:])
+            if rank is not None:
+                yield rank, name
+
+    def query(self, term, limit=None, offset=0):
+        ranked = self._ranked(term.lower())
+        top = sorted(ranked) if limit is None else heapq.nsmallest(offset + limit, ranked)
+        for _, name in top[offset:]:
+            yield self.get(name)
+
+    def fuzzy_search(self, term, max_distance=2, limit=None):
+        found = fuzzy_scan(self.iter_names(), term, max_distance)[:limit]
+        return [(distance, self.get(name)) for distance, name in found]
+
+    def whois(self, phone):
+        phone = Phone(phone).value
+        names = [name for name, offset in self._iter_file() if phone in unpack_record(self._map, offset)[1]]
+        names.extend(name for name, record in self._changed.items() if phone in record.phone_values())
+        return [self.get(name) for name in sorted(names)]
+
+    def upcoming_birthdays(self, days, today=None):
+        # The packed file has no calendar index, so birthdays are a scan over the ordinals.
+        today = today or date.today()
+        found = []
+        for name, offset in self._iter_file():
+            _, _, birthday_ordinal, _ = unpack_record(self._map, offset)
+            if birthday_ordinal:
+                days_left = (next_birthday(date.fromordinal(birthday_ordinal), today) - today).days
+                if days_left <= days:
+                    found.append((days_left, name))
+        for name, record in self._changed.items():
+            birthday = record.birthday_date()
+            if birthday:
+                days_left = (next_birthday(birthday, today) - today).days
+                if days_left <= days:
+                    found.append((days_left, name))
+        return [(days_left, self.get(name)) for days_left, name in sorted(found)]
+
+    def _birthday_columns(self):
+        # Built from a scan for each query; the file keeps no birthday columns.
+        columns = BirthdayColumns()
+        for name, offset in self._iter_file():
+            birthday_ordinal = unpack_record(self._map, offset)[2]
+            if birthday_ordinal:
+                columns.update(name, date.fromordinal(birthday_ordinal))
+        for name, record in self._changed.items():
+            columns.update(name, record.birthday_date())
+        return columns
+
+    def nearest_birthdays(self, count=None, today=None):
+        found = self._birthday_columns().nearest(today or current_day(), count)
+        return [(days_left, self.get(name)) for days_left, name in found]
+
+    def birthdays_in_month(self, month):
+        return [self.get(name) for _, name in self._birthday_columns().in_month(month)]
+
+    def contacts_aged(self, min_age, max_age, today=None):
+        found = self._birthday_columns().aged(min_age, max_age, today or current_day())
+        return [(age, self.get(name)) for age, name in found]
+
+    def _iter_packed(self):
+        # Unchanged records are copied as raw bytes, without hydrating them.
+        for name, offset in self._iter_file():
+            end = unpack_record(self._map, offset)[3]
+            yield name, bytes(self._map[offset:end])
+        for name, record in self._changed.items():
+            yield name, pack_record(*record_fields(record))
+
+    @contextlib.contextmanager
+    def bulk(self):
+        with self.lock:
+            try:
+                yield self
+            finally:
+                self.save_data()
+
+    @property
+    def dirty(self):
+        return bool(self._changed or self._deleted)
+
+    @timed("save_data")
+    def save_data(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp_path = self.file_path + ".tmp"
+            write_store(tmp_path, self._iter_packed())
+            self._close_map()
+            os.replace(tmp_path, self.file_path)
+            sync_directory(self.file_path)
+            self.load_data()
+
+    def close(self):
+        self.save_data()
+        self._close_map()
+
+    @classmethod
+    def convert(cls, book: AddressBook, file_path):
+        tmp_path = file_path + ".tmp"
+        write_store(tmp_path, ((record.name.value, pack_record(*record_fields(record))) for record in book.data.values()))
+        os.replace(tmp_path, file_path)
+        return cls(file_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("/// Usage: python mmap_store.py [address_book.json] [address_book.abm]")
+        sys.exit(1)
+    store = MappedAddressBook.convert(load_folded(sys.argv[1]), sys.argv[2])
+    print(f"/// {len(store)} contacts written to {sys.argv[2]}")
@@ -0,0 +1,70 @@
+import unicodedata
+from bisect import bisect_left, bisect_right
+
+
+def name_key(name):
+    # Canonical form names are stored and looked up by: "ANNA", "anna" and a
+    # decomposed "Anna" with combining accents are the same key. The first
+    # letter is raised as Name does, so a typed name and the display name it
+    # is saved under share a key even where case folding disagrees ("ılgın"
+    # is saved as "Ilgın").
+    return unicodedata.normalize("NFKC", name[:1].upper() + name[1:]).casefold()
+
+
+class SortedNames:
+    # Names kept in sorted order with bisect, so a page is a slice of the list
+    # and a cursor is a binary search away. Bulk loads defer their inserts and
+    # sort once instead of paying a list shift per name.
+
+    def __init__(self):
+        self.names = []
+        self.pending = []
+
+    def __len__(self):
+        return len(self.names) + len(self.pending)
+
+    def __iter__(self):
+        self.flush()
+        return iter(self.names)
+
+    def flush(self):
+        if self.pending:
+            self.names.extend(self.pending)
+            self.names.sort()
+            self.pending = []
+
+    def add(self, name, defer=False):
+        if defer:
+            self.pending.append(name)
+            return
+        self.flush()
+        position = bisect_left(self.names, name)
+        if position == len(self.names) or self.names[position] != name:
+            self.names.insert(position, name)
+
+    def remove(self, name):
+        self.flush()
+        position = bisect_left(self.names, name)
+        if position < len(self.names) and self.names[position] == name:
+            del self.names[position]
+
+    def slice(self, start, stop):
+        self.flush()
+        return self.names[start:stop]
+
+    def after(self, cursor, count):
+        self.flush()
+        start = bisect_right(self.names, cursor) if cursor is not None else 0
+        return self.names[start:start + count]
+
+    def prefixed(self, prefix, limit=None):
+        # Names starting with `prefix`: one bisect to the first, then a walk while they match.
+        self.flush()
+        position = bisect_left(self.names, prefix)
+        found = []
+        while position < len(self.names) and self.names[position].startswith(prefix):
+            if limit is not None and len(found) >= limit:
+                break
+            found.append(self.names[position])
+            position += 1
+        return found
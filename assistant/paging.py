@@ -0,0 +1,25 @@
+class Paging:
+    # Page and batch access shared by the address book backends. Each backend
+    # provides page_size, __len__, get_contacts(start, stop) and
+    # page_after(cursor, page_size), both in name order.
+
+    def page_count(self, page_size=None):
+        page_size = page_size or self.page_size
+        return (len(self) - 1) // page_size + 1
+
+    def page(self, page_number, page_size=None):
+        # Pages are 1-based and follow name order; only the page itself is copied.
+        page_size = page_size or self.page_size
+        start = (page_number - 1) * page_size
+        return self.get_contacts(start, start + page_size)
+
+    def iter_batches(self, batch_size=None):
+        # Yields the whole book in name order, one page-sized list at a time. Each
+        # batch starts after the last name of the previous one, so the book may
+        # change in between: contacts present throughout come out exactly once.
+        cursor = None
+        while True:
+            records, cursor = self.page_after(cursor, batch_size)
+            if not records:
+                return
+            yield records
@@ -0,0 +1,44 @@
+class PhoneIndex:
+    # Phone number -> owner key. A number shared by several contacts maps to a
+    # set of keys instead, so the common case costs a single dict entry.
+
+    def __init__(self):
+        self.owners = {}
+
+    def __len__(self):
+        return len(self.owners)
+
+    def add(self, number, key):
+        current = self.owners.get(number)
+        if current is None:
+            self.owners[number] = key
+        elif isinstance(current, set):
+            current.add(key)
+        elif current != key:
+            self.owners[number] = {current, key}
+
+    def discard(self, number, key):
+        current = self.owners.get(number)
+        if current is None:
+            return
+        if isinstance(current, set):
+            current.discard(key)
+            if len(current) == 1:
+                self.owners[number] = current.pop()
+        elif current == key:
+            del self.owners[number]
+
+    def owners_of(self, number):
+        current = self.owners.get(number)
+        if current is None:
+            return []
+        if isinstance(current, set):
+            return sorted(current)
+        return [current]
+
+    def other_owner(self, number, key):
+        # Any owner of `number` besides `key`, or None.
+        for owner in self.owners_of(number):
+            if owner != key:
+                return owner
+        return None
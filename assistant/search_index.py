@@ -0,0 +1,106 @@
+from collections import defaultdict
+
+
+GRAM_SIZE = 3
+
+EXACT_PHONE, NAME_PREFIX, PHONE_PREFIX, NAME_INFIX, PHONE_INFIX = range(5)
+
+
+def ngrams(text, size=GRAM_SIZE):
+    return {text[start:start + size] for start in range(len(text) - size + 1)}
+
+
+def match_rank(term, name, phones):
+    # Lower ranks sort first; None when neither the name nor a phone contains the term.
+    if term in phones:
+        return EXACT_PHONE
+    if name.startswith(term):
+        return NAME_PREFIX
+    if any(phone.startswith(term) for phone in phones):
+        return PHONE_PREFIX
+    if term in name:
+        return NAME_INFIX
+    if any(term in phone for phone in phones):
+        return PHONE_INFIX
+    return None
+
+
+class NgramIndex:
+    # Maps every trigram of the indexed texts to the keys containing it. A term
+    # of GRAM_SIZE or more characters intersects the postings of its trigrams
+    # and verifies the few candidates left. Shorter terms match a large share of
+    # the book anyway, so they are checked against the stored texts directly.
+
+    def __init__(self, size=GRAM_SIZE):
+        self.size = size
+        self.postings = defaultdict(set)
+        self.texts = {}
+        self.order = {}
+        self._counter = 0
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _grams(self, texts):
+        grams = set()
+        for text in texts:
+            grams |= ngrams(text, self.size)
+        return grams
+
+    def update(self, key, texts):
+        texts = tuple(texts)
+        old_texts = self.texts.get(key)
+        if old_texts is None:
+            self.order[key] = self._counter
+            self._counter += 1
+            old_grams = set()
+        elif old_texts == texts:
+            return
+        else:
+            old_grams = self._grams(old_texts)
+
+        new_grams = self._grams(texts)
+        for gram in old_grams - new_grams:
+            self._discard(gram, key)
+        for gram in new_grams - old_grams:
+            self.postings[gram].add(key)
+        self.texts[key] = texts
+
+    def remove(self, key):
+        texts = self.texts.pop(key, None)
+        if texts is None:
+            return
+        del self.order[key]
+        for gram in self._grams(texts):
+            self._discard(gram, key)
+
+    def _discard(self, gram, key):
+        keys = self.postings.get(gram)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.postings[gram]
+
+    def candidates(self, term):
+        if len(term) < self.size:
+            return {key for key, texts in self.texts.items() if any(term in text for text in texts)}
+
+        posting_lists = []
+        for gram in ngrams(term, self.size):
+            keys = self.postings.get(gram)
+            if not keys:
+                return set()
+            posting_lists.append(keys)
+        posting_lists.sort(key=len)
+
+        found = set(posting_lists[0])
+        for keys in posting_lists[1:]:
+            found &= keys
+            if not found:
+                break
+        if len(term) == self.size:
+            return found
+        return {key for key in found if any(term in text for text in self.texts[key])}
+
+    def search(self, term):
+        return sorted(self.candidates(term), key=self.order.__getitem__)
@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import contextlib
+import signal
+import sys
+
+import b_hw12
+from cl_hw12 import AddressBook
+
+
+WRITE_HANDLERS = {
+    b_hw12.add_handler,
+    b_hw12.cp_handler,
+    b_hw12.cd_handler,
+    b_hw12.delete_handler,
+    b_hw12.import_handler,
+    b_hw12.profile_handler,
+}
+
+
+class ReadWriteLock:
+    # Many readers or one writer. A waiting writer holds back new readers so it
+    # can't starve, except while a save is running: the save only excludes
+    # writers, and readers keep going next to it.
+
+    def __init__(self):
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self._saving = False
+        self._condition = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def read(self):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: not self._writer and (not self._waiting_writers or self._saving)
+            )
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def write(self):
+        async with self._condition:
+            self._waiting_writers += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def save(self):
+        async with self.read():
+            self._saving = True
+            try:
+                yield
+            finally:
+                self._saving = False
+
+
+def render(result):
+    text = result if isinstance(result, str) else "\n".join(result)
+    return text.rstrip("\n")
+
+
+class AssistantServer:
+    # Serves the CLI's line protocol: one command per line, answered with the
+    # handler's output followed by an empty line.
+
+    def __init__(self, save_interval=60.0):
+        self.lock = ReadWriteLock()
+        self.save_interval = save_interval
+        self.parallel_reads = isinstance(b_hw12.address_book, AddressBook)
+
+    def _run(self, handler, data):
+        return render(handler(*data))
+
+    def _write(self, handler, data):
+        # A save or compaction takes the book's own lock to list its records,
+        # so writes hold it too.
+        with b_hw12.address_book.lock:
+            return self._run(handler, data)
+
+    async def execute(self, handler, data):
+        loop = asyncio.get_running_loop()
+        # Only the in-memory book is safe to read from several threads at once.
+        if handler in WRITE_HANDLERS or not self.parallel_reads:
+            async with self.lock.write():
+                return await loop.run_in_executor(None, self._write, handler, data)
+        async with self.lock.read():
+            return await loop.run_in_executor(None, self._run, handler, data)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                handler, data = b_hw12.parser(line.decode("utf-8"))
+                response = await self.execute(handler, data)
+                writer.write(response.encode("utf-8") + b"\n\n")
+                await writer.drain()
+                if handler == b_hw12.exit_handler:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def save(self):
+        # Journaled books are left to journal compaction, as in AutoSaver.
+        if getattr(b_hw12.address_book, "journaled", False) or not b_hw12.address_book.dirty:
+            return
+        loop = asyncio.get_running_loop()
+        async with self.lock.save():
+            await loop.run_in_executor(None, b_hw12.address_book.save_data)
+
+    async def autosave(self):
+        while True:
+            await asyncio.sleep(self.save_interval)
+            await self.save()
+
+    async def serve(self, host=None, port=None, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        address = unix_path or f"{host}:{port}"
+        print(f"/// Assistant server listening on {address}", file=sys.stderr)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(signal_number, stop.set)
+
+        autosave = asyncio.create_task(self.autosave()) if self.save_interval else None
+        async with server:
+            await stop.wait()
+        if autosave:
+            autosave.cancel()
+        async with self.lock.write():
+            b_hw12.address_book.close()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Serve the address book assistant to many clients.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    arg_parser.add_argument("--save-interval", type=float, default=60.0, metavar="SECONDS", help="0 disables periodic saves")
+    arg_parser.add_argument("--storage", choices=("json", "mmap", "sqlite", "sharded"), default="json")
+    arg_parser.add_argument("--shards", type=int, default=4, help="worker processes for --storage sharded")
+    arg_parser.add_argument("--file", help="address book file")
+    arg_parser.add_argument("--snapshot", choices=("json", "binary"), help="save --storage json books in this format")
+    arg_parser.add_argument("--compression", choices=("none", "zlib", "lzma"), default="zlib")
+    arg_parser.add_argument("--metrics", action="store_true", help="collect per-command metrics (see the stats command)")
+    args = arg_parser.parse_args(argv)
+
+    b_hw12.address_book = b_hw12.open_address_book(args.storage, args.file, args.shards, args.snapshot, args.compression)
+    b_hw12.metrics.enabled = args.metrics
+    server = AssistantServer(args.save_interval)
+    asyncio.run(server.serve(args.host, args.port, args.unix))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+import contextlib
+import heapq
+import multiprocessing
+import os
+import threading
+import zlib
+from datetime import date
+from typing import Optional
+
+from birthday_index import current_day
+from cl_hw12 import AddressBook, Birthday, DuplicatePhoneError, Phone, Record
+from metrics import timed
+from name_index import name_key
+from paging import Paging
+
+
+def shard_of(name, count):
+    # crc32 rather than hash(): str hashes are salted per process. Names that
+    # differ only in case share a key, and so a shard.
+    return zlib.crc32(name_key(name).encode("utf-8")) % count
+
+
+class Shard:
+    # Runs in a worker process and owns one AddressBook. Its methods are the
+    # operations the parent may call; records travel as Record.packed() tuples.
+
+    def __init__(self, file_path):
+        self.book = AddressBook(file_path, journal=True)
+        self._bulk = None
+
+    def set_many(self, records):
+        for packed in records:
+            self.book[packed[0]] = Record.from_packed(*packed)
+
+    def begin_bulk(self):
+        self._bulk = self.book.bulk()
+        self._bulk.__enter__()
+
+    def end_bulk(self):
+        bulk, self._bulk = self._bulk, None
+        if bulk is not None:
+            bulk.__exit__(None, None, None)
+
+    def delete(self, name):
+        if name not in self.book:
+            return False
+        del self.book[name]
+        return True
+
+    def get(self, name):
+        record = self.book.get(name)
+        return record.packed() if record else None
+
+    def get_many(self, names):
+        return [self.book.data[name].packed() for name in names]
+
+    def contains(self, name):
+        return name in self.book
+
+    def length(self):
+        return len(self.book)
+
+    def change(self, name, op, *args):
+        record = self.book.get(name)
+        if record is None:
+            return
+        if op == "add_phone":
+            record.add_phone(*args)
+        elif op == "change_phone":
+            record.change_phone(*args)
+        elif op == "birthday":
+            record.birthday = Birthday(date.fromordinal(args[0])) if args[0] else None
+
+    def owners(self, numbers):
+        data = self.book.data
+        return [(number, [data[owner].name.value for owner in self.book.phone_index.owners_of(number)]) for number in numbers]
+
+    def ranked(self, term, count):
+        return [(rank, name, self.book.data[name].packed()) for rank, name in self.book.ranked(term, count)]
+
+    def search(self, term):
+        return [record.packed() for record in self.book.search(term)]
+
+    def whois(self, phone):
+        return [record.packed() for record in self.book.whois(phone)]
+
+    def upcoming(self, days, today):
+        return [(days_left, record.packed()) for days_left, record in self.book.upcoming_birthdays(days, today)]
+
+    def nearest(self, count, today):
+        return [(days_left, record.packed()) for days_left, record in self.book.nearest_birthdays(count, today)]
+
+    def in_month(self, month):
+        return [(record.birthday_date().day, record.packed()) for record in self.book.birthdays_in_month(month)]
+
+    def aged(self, min_age, max_age, today):
+        return [(age, record.packed()) for age, record in self.book.contacts_aged(min_age, max_age, today)]
+
+    def fuzzy(self, term, max_distance, limit):
+        return [(distance, record.packed()) for distance, record in self.book.fuzzy_search(term, max_distance, limit)]
+
+    def complete(self, prefix, limit):
+        return self.book.complete(prefix, limit)
+
+    def names(self, stop):
+        return self.book.name_order.slice(0, stop)
+
+    def records_after(self, cursor, count):
+        return self.get_many(self.book.name_order.after(name_key(cursor) if cursor is not None else None, count))
+
+    def save(self):
+        self.book.save_data()
+
+    def close(self):
+        self.end_bulk()
+        self.book.close()
+
+
+def serve_shard(connection, file_path):
+    shard = Shard(file_path)
+    while True:
+        try:
+            op, args = connection.recv()
+        except EOFError:  # the parent went away without closing us
+            shard.close()
+            return
+        try:
+            reply = ("ok", getattr(shard, op)(*args))
+        except Exception as error:
+            reply = ("error", error)
+        connection.send(reply)
+        if op == "close":
+            return
+
+
+class ShardedAddressBook(Paging):
+    # AddressBook with the same interface whose contacts are hash-partitioned
+    # by name across `shards` worker processes, each with its own file and
+    # journal. Lookups and edits go to the owning shard; searches, birthdays
+    # and paging are sent to every shard at once and the answers merged, so
+    # the shards work in parallel. Records handed out are copies whose edits
+    # come back through _record_changed and are forwarded to their shard.
+
+    def __init__(self, file_path="address_book.json", shards=4, page_size=10, unique_phones=False):
+        self.file_path = file_path
+        self.page_size = page_size
+        self.unique_phones = unique_phones
+        self.lock = threading.RLock()
+        self._version = 0
+        self._saved_version = 0
+        self._buffer = None  # per-shard records waiting to be sent while in bulk()
+
+        base = os.path.splitext(file_path)[0]
+        self._connections = []
+        self._processes = []
+        for index in range(shards):
+            parent_end, child_end = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=serve_shard,
+                args=(child_end, f"{base}.shard{index}of{shards}.json"),
+                daemon=True,
+            )
+            process.start()
+            child_end.close()
+            self._connections.append(parent_end)
+            self._processes.append(process)
+
+    @staticmethod
+    def _result(reply):
+        status, value = reply
+        if status == "error":
+            raise value
+        return value
+
+    def _call(self, index, op, *args):
+        with self.lock:
+            connection = self._connections[index]
+            connection.send((op, args))
+            return self._result(connection.recv())
+
+    def _fan_out(self, op, *args):
+        # Every shard gets the request before any answer is read.
+        with self.lock:
+            for connection in self._connections:
+                connection.send((op, args))
+            replies = [connection.recv() for connection in self._connections]
+        return [self._result(reply) for reply in replies]
+
+    def _shard(self, name):
+        return shard_of(name, len(self._connections))
+
+    def _restore(self, packed):
+        record = Record.from_packed(*packed)
+        record.book = self
+        return record
+
+    def _flush(self):
+        if self._buffer is None:
+            return
+        with self.lock:
+            pending = [(index, records) for index, records in enumerate(self._buffer) if records]
+            for index, records in pending:
+                self._connections[index].send(("set_many", (records,)))
+            replies = [self._connections[index].recv() for index, _ in pending]
+            self._buffer = [[] for _ in self._connections]
+        for reply in replies:
+            self._result(reply)
+
+    @contextlib.contextmanager
+    def bulk(self, batch_size=1000):
+        # Records are sent to the shards `batch_size` at a time, and each shard
+        # takes the AddressBook.bulk() shortcuts until the end. If the body
+        # fails, the records still buffered are sent too, as AddressBook.bulk()
+        # keeps everything that went in: the caller reports how far it got.
+        with self.lock:
+            self._fan_out("begin_bulk")
+            self._buffer = [[] for _ in self._connections]
+            self._batch_size = batch_size
+            try:
+                yield self
+            finally:
+                try:
+                    self._flush()
+                finally:
+                    self._buffer = None
+                    self._fan_out("end_bulk")
+
+    @property
+    def dirty(self):
+        return self._version != self._saved_version
+
+    @property
+    def journaled(self):
+        return True  # every shard journals its changes
+
+    def load_data(self):
+        pass  # each shard loads its own file when it starts
+
+    @timed("save_data")
+    def save_data(self):
+        with self.lock:
+            version = self._version
+            self._fan_out("save")
+            self._saved_version = version
+
+    def close(self):
+        with self.lock:
+            if not self._connections:
+                return
+            self._flush()
+            self._fan_out("close")
+            for connection in self._connections:
+                connection.close()
+            for process in self._processes:
+                process.join()
+            self._connections = []
+            self._processes = []
+
+    def add_record(self, name, phone, birthday=None):
+        self[name] = Record(name, phone, birthday)
+
+    def __setitem__(self, name, record):
+        if self.unique_phones:
+            self._check_phone(name, record.phone_numbers())
+        index = self._shard(name)
+        with self.lock:
+            if self._buffer is not None:
+                self._buffer[index].append(record.packed())
+                if len(self._buffer[index]) >= self._batch_size:
+                    self._flush()
+            else:
+                self._call(index, "set_many", [record.packed()])
+            self._version += 1
+        record.book = self
+
+    def __delitem__(self, name):
+        self._flush()
+        if not self._call(self._shard(name), "delete", name):
+            raise KeyError(name)
+        self._version += 1
+
+    def __contains__(self, name):
+        self._flush()
+        return self._call(self._shard(name), "contains", name)
+
+    def __len__(self):
+        self._flush()
+        return sum(self._fan_out("length"))
+
+    def __iter__(self):
+        for records in self.iter_batches(500):
+            yield from records
+
+    def get(self, name: str) -> Optional[Record]:
+        self._flush()
+        packed = self._call(self._shard(name), "get", name)
+        return self._restore(packed) if packed else None
+
+    def __getitem__(self, name):
+        record = self.get(name)
+        if record is None:
+            raise KeyError(name)
+        return record
+
+    def _check_phone(self, name, numbers):
+        self._flush()
+        for owners in self._fan_out("owners", list(numbers)):
+            for number, names in owners:
+                others = [owner for owner in names if name_key(owner) != name_key(name)]
+                if others:
+                    raise DuplicatePhoneError(f"Phone number {number:010d} already belongs to contact {others[0]}.")
+
+    def _claim_phone(self, record, number):
+        if self.unique_phones:
+            self._check_phone(record.name.value, [number])
+
+    def _record_changed(self, record, op, *args):
+        if op == "birthday":
+            args = (args[0].value.toordinal() if args[0] else 0,)
+        else:
+            args = tuple(phone.value for phone in args)
+        self._flush()
+        self._call(self._shard(record.name.value), "change", record.name.value, op, *args)
+        self._version += 1
+
+    def search(self, term):
+        self._flush()
+        packed = [record for found in self._fan_out("search", term) for record in found]
+        return [self._restore(record) for record in sorted(packed, key=lambda item: name_key(item[0]))]
+
+    def query(self, term, limit=None, offset=0):
+        self._flush()
+        count = None if limit is None else offset + limit
+        ranked = heapq.merge(*self._fan_out("ranked", term, count))
+        for _, _, packed in list(ranked)[offset:count]:
+            yield self._restore(packed)
+
+    def whois(self, phone):
+        Phone(phone)
+        self._flush()
+        merged = heapq.merge(*self._fan_out("whois", phone), key=lambda item: name_key(item[0]))
+        return [self._restore(packed) for packed in merged]
+
+    def upcoming_birthdays(self, days, today=None):
+        self._flush()
+        today = today or date.today()
+        merged = heapq.merge(*self._fan_out("upcoming", days, today), key=lambda item: (item[0], name_key(item[1][0])))
+        return [(days_left, self._restore(packed)) for days_left, packed in merged]
+
+    def _merged(self, op, *args):
+        # Merges (number, packed record) lists from every shard the way each shard ordered them.
+        self._flush()
+        return heapq.merge(*self._fan_out(op, *args), key=lambda item: (item[0], name_key(item[1][0])))
+
+    def nearest_birthdays(self, count=None, today=None):
+        merged = self._merged("nearest", count, today or current_day())
+        return [(days_left, self._restore(packed)) for days_left, packed in list(merged)[:count]]
+
+    def birthdays_in_month(self, month):
+        return [self._restore(packed) for _, packed in self._merged("in_month", month)]
+
+    def contacts_aged(self, min_age, max_age, today=None):
+        merged = self._merged("aged", min_age, max_age, today or current_day())
+        return [(age, self._restore(packed)) for age, packed in merged]
+
+    def fuzzy_search(self, term, max_distance=2, limit=None):
+        self._flush()
+        merged = heapq.merge(*self._fan_out("fuzzy", term, max_distance, limit), key=lambda item: (item[0], name_key(item[1][0])))
+        return [(distance, self._restore(packed)) for distance, packed in list(merged)[:limit]]
+
+    def complete(self, prefix, limit=None):
+        self._flush()
+        return sorted(
+            (name for names in self._fan_out("complete", prefix, limit) for name in names), key=name_key
+        )[:limit]
+
+    def get_all_contacts(self):
+        return list(self)
+
+    def get_contacts(self, start, stop):
+        # Offset paging needs the first `stop` names of every shard to know which come first.
+        self._flush()
+        names = list(heapq.merge(*self._fan_out("names", stop)))[start:stop]
+        wanted = [[] for _ in self._connections]
+        for name in names:
+            wanted[self._shard(name)].append(name)
+        with self.lock:
+            for index, shard_names in enumerate(wanted):
+                self._connections[index].send(("get_many", (shard_names,)))
+            replies = [connection.recv() for connection in self._connections]
+        records = {name_key(packed[0]): packed for reply in replies for packed in self._result(reply)}
+        return [self._restore(records[name]) for name in names]
+
+    def page_after(self, cursor, page_size=None):
+        self._flush()
+        page_size = page_size or self.page_size
+        merged = heapq.merge(*self._fan_out("records_after", cursor, page_size), key=lambda item: name_key(item[0]))
+        merged = list(merged)[:page_size]
+        records = [self._restore(packed) for packed in merged]
+        next_cursor = records[-1].name.value if records else None
+        return records, next_cursor
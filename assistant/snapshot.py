@@ -0,0 +1,163 @@
+import lzma
+import struct
+import sys
+import zlib
+
+from atomic_file import atomic_write
+from mmap_store import BIRTHDAY, NAME_LEN, PHONE_COUNT
+
+
+# Binary snapshot layout, all integers little-endian:
+#   header  magic "ABSN", format version (u16), compression (u8), reserved (u8), record count (u32)
+#   blocks  raw size (u32), stored size (u32), crc32 of the raw bytes (u32), then the stored bytes
+#   end     a block header with raw size 0
+# A block's raw bytes are records, each prefixed with its length (u32) and laid
+# out as in mmap_store: name length (u16), UTF-8 name, phone count (u8), phones
+# (u64 each), birthday date ordinal (i32, 0 when unset).
+MAGIC = b"ABSN"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBI")
+BLOCK = struct.Struct("<III")
+RECORD_LEN = struct.Struct("<I")
+BLOCK_SIZE = 1 << 20  # raw bytes per block, before compression
+
+COMPRESSIONS = ("none", "zlib", "lzma")
+COMPRESS = {
+    "none": lambda data: data,
+    "zlib": lambda data: zlib.compress(data, 1),
+    "lzma": lambda data: lzma.compress(data, preset=1),
+}
+DECOMPRESS = {
+    "none": lambda data: data,
+    "zlib": zlib.decompress,
+    "lzma": lzma.decompress,
+}
+
+_phone_structs = {}
+
+
+def phones_struct(count):
+    phones = _phone_structs.get(count)
+    if phones is None:
+        phones = _phone_structs[count] = struct.Struct(f"<{count}Q")
+    return phones
+
+
+def is_snapshot(path):
+    try:
+        with open(path, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def encode_record(name, phones, birthday_ordinal):
+    name_bytes = name.encode("utf-8")
+    body = b"".join((
+        NAME_LEN.pack(len(name_bytes)),
+        name_bytes,
+        PHONE_COUNT.pack(len(phones)),
+        phones_struct(len(phones)).pack(*phones),
+        BIRTHDAY.pack(birthday_ordinal),
+    ))
+    return RECORD_LEN.pack(len(body)) + body
+
+
+def write_snapshot(path, contacts, compression="zlib", block_size=BLOCK_SIZE):
+    # contacts: a list of (name, phone numbers as ints, birthday ordinal) tuples.
+    compress = COMPRESS[compression]
+    with atomic_write(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, COMPRESSIONS.index(compression), 0, len(contacts)))
+        block = []
+        size = 0
+        for contact in contacts:
+            record = encode_record(*contact)
+            block.append(record)
+            size += len(record)
+            if size >= block_size:
+                write_block(file, b"".join(block), compress)
+                block = []
+                size = 0
+        if block:
+            write_block(file, b"".join(block), compress)
+        file.write(BLOCK.pack(0, 0, 0))
+
+
+def write_block(file, raw, compress):
+    stored = compress(raw)
+    file.write(BLOCK.pack(len(raw), len(stored), zlib.crc32(raw)))
+    file.write(stored)
+
+
+def read_snapshot(path):
+    # Yields (name, phone numbers, birthday ordinal) tuples. A wrong checksum or a
+    # file cut short raises ValueError rather than loading part of the book.
+    with open(path, "rb") as file:
+        magic, version, compression, _, count = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an address book snapshot")
+        if version != VERSION or compression >= len(COMPRESSIONS):
+            raise ValueError(f"{path} is a snapshot of an unsupported version {version}")
+        decompress = DECOMPRESS[COMPRESSIONS[compression]]
+        seen = 0
+        block_number = 0
+        while True:
+            header = file.read(BLOCK.size)
+            if len(header) < BLOCK.size:
+                raise ValueError(f"{path} is truncated")
+            raw_size, stored_size, checksum = BLOCK.unpack(header)
+            if raw_size == 0:
+                break
+            stored = file.read(stored_size)
+            try:
+                raw = decompress(stored) if len(stored) == stored_size else b""
+            except (zlib.error, lzma.LZMAError):
+                raw = b""
+            if len(raw) != raw_size or zlib.crc32(raw) != checksum:
+                raise ValueError(f"{path}: block {block_number} is corrupt")
+            for contact in decode_block(raw):
+                seen += 1
+                yield contact
+            block_number += 1
+        if seen != count:
+            raise ValueError(f"{path} holds {seen} contacts, its header says {count}")
+
+
+def decode_block(raw):
+    offset = 0
+    end = len(raw)
+    while offset < end:
+        (record_len,) = RECORD_LEN.unpack_from(raw, offset)
+        offset += RECORD_LEN.size
+        next_offset = offset + record_len
+        (name_len,) = NAME_LEN.unpack_from(raw, offset)
+        offset += NAME_LEN.size
+        name = raw[offset:offset + name_len].decode("utf-8")
+        offset += name_len
+        (phone_count,) = PHONE_COUNT.unpack_from(raw, offset)
+        offset += PHONE_COUNT.size
+        phones = phones_struct(phone_count).unpack_from(raw, offset)
+        (birthday_ordinal,) = BIRTHDAY.unpack_from(raw, next_offset - BIRTHDAY.size)
+        yield name, phones, birthday_ordinal
+        offset = next_offset
+
+
+def convert(source, target, compression="zlib"):
+    # A snapshot becomes JSON and anything else becomes a snapshot.
+    from cl_hw12 import load_folded
+
+    book = load_folded(source)
+    book.file_path = target
+    book.snapshot_format = "json" if book.snapshot_format == "binary" else "binary"
+    book.compression = compression
+    book.save_data()
+    return book
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4) or (len(sys.argv) == 4 and sys.argv[3] not in COMPRESSIONS):
+        print("/// Usage: python snapshot.py [source] [target] [none|zlib|lzma]")
+        print("/// A JSON address book is written as a binary snapshot, a snapshot as JSON.")
+        sys.exit(1)
+    converted = convert(sys.argv[1], sys.argv[2], *sys.argv[3:])
+    print(f"/// {len(converted)} contacts written to {sys.argv[2]} as {converted.snapshot_format}")
@@ -0,0 +1,339 @@
+import contextlib
+import os
+import sqlite3
+import sys
+import threading
+from datetime import date, timedelta
+from typing import Optional
+
+from birthday_columns import BirthdayColumns
+from birthday_index import current_day, next_birthday
+from cl_hw12 import Birthday, DuplicatePhoneError, Name, Phone, Record, journal_path, load_folded, parse_date
+from fuzzy_index import fuzzy_scan
+from metrics import timed
+from name_index import name_key
+from paging import Paging
+from json_stream import iter_array_items
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    birthday INTEGER,
+    birthday_md INTEGER
+);
+CREATE TABLE IF NOT EXISTS phones (
+    contact_id INTEGER NOT NULL REFERENCES contacts(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    phone TEXT NOT NULL,
+    PRIMARY KEY (contact_id, position)
+);
+CREATE INDEX IF NOT EXISTS phones_phone ON phones(phone);
+CREATE INDEX IF NOT EXISTS contacts_birthday_md ON contacts(birthday_md);
+"""
+
+
+def birthday_columns(birthday):
+    if not birthday:
+        return None, None
+    value = birthday.value
+    return value.toordinal(), value.month * 100 + value.day
+
+
+def like_pattern(term):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class SQLiteAddressBook(Paging):
+    # AddressBook with the same interface, stored in normalized SQLite tables.
+    # Lookups, search, paging and birthday queries run as indexed SQL; writes
+    # are grouped into transactions of `batch_size` statements.
+
+    def __init__(self, file_path="address_book.db", page_size=10, batch_size=1000, unique_phones=False):
+        self.file_path = file_path
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.unique_phones = unique_phones
+        self.connection = None
+        self._pending = 0
+        self.lock = threading.RLock()
+
+        self.load_data()
+
+    @timed("load_data")
+    def load_data(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.file_path, check_same_thread=False)
+            self.connection.execute("PRAGMA foreign_keys = ON")
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def bulk(self, batch_size=10000):
+        # Bigger transactions while many contacts go in at once.
+        with self.lock:
+            saved_batch_size, self.batch_size = self.batch_size, max(self.batch_size, batch_size)
+            try:
+                yield self
+            finally:
+                self.batch_size = saved_batch_size
+                self.save_data()
+
+    @property
+    def dirty(self):
+        return self._pending > 0
+
+    @timed("save_data")
+    def save_data(self):
+        with self.lock:
+            self.connection.commit()
+            self._pending = 0
+
+    def close(self):
+        if self.connection is not None:
+            self.save_data()
+            self.connection.close()
+            self.connection = None
+
+    def _write(self, sql, parameters=()):
+        cursor = self.connection.execute(sql, parameters)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.save_data()
+        return cursor
+
+    def _contact_id(self, name):
+        row = self.connection.execute("SELECT id FROM contacts WHERE name = ?", (Name(name).value,)).fetchone()
+        return row[0] if row else None
+
+    def _build(self, rows):
+        # rows: (id, name, birthday ordinal); phones are fetched for up to 500 contacts per query.
+        rows = list(rows)
+        phones = {contact_id: [] for contact_id, _, _ in rows}
+        contact_ids = list(phones)
+        for start in range(0, len(contact_ids), 500):
+            chunk = contact_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for contact_id, phone in self.connection.execute(
+                f"SELECT contact_id, phone FROM phones WHERE contact_id IN ({placeholders}) ORDER BY contact_id, position",
+                chunk,
+            ):
+                phones[contact_id].append(phone)
+
+        records = []
+        for contact_id, name, birthday_ordinal in rows:
+            birthday = Birthday(date.fromordinal(birthday_ordinal)) if birthday_ordinal else None
+            record = Record.restore(name, phones[contact_id], birthday)
+            record.book = self
+            records.append(record)
+        return records
+
+    def _select(self, where="", parameters=(), suffix="ORDER BY name"):
+        sql = f"SELECT id, name, birthday FROM contacts {where} {suffix}"
+        return self._build(self.connection.execute(sql, parameters))
+
+    def add_record(self, name, phone, birthday=None):
+        self[name] = Record(name, phone, birthday)
+
+    def __setitem__(self, name, record):
+        name = record.name.value
+        if self.unique_phones:
+            for phone in record.phone_values():
+                self._check_phone(name, phone)
+        self._write("DELETE FROM contacts WHERE name = ?", (name,))
+        self._insert(name, record.phone_values(), *birthday_columns(record.birthday))
+        record.book = self
+
+    def _insert(self, name, phones, birthday, birthday_md):
+        contact_id = self._write(
+            "INSERT INTO contacts (name, birthday, birthday_md) VALUES (?, ?, ?)", (name, birthday, birthday_md)
+        ).lastrowid
+        self.connection.executemany(
+            "INSERT INTO phones (contact_id, position, phone) VALUES (?, ?, ?)",
+            [(contact_id, position, phone) for position, phone in enumerate(phones)],
+        )
+
+    def __delitem__(self, name):
+        if self._write("DELETE FROM contacts WHERE name = ?", (Name(name).value,)).rowcount == 0:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        return self._contact_id(name) is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def __iter__(self):
+        for records in self.iter_batches(500):
+            yield from records
+
+    def get(self, name: str) -> Optional[Record]:
+        # Names are stored as Name normalizes them, so "john" finds "John".
+        records = self._select("WHERE name = ?", (Name(name).value,), "")
+        return records[0] if records else None
+
+    def __getitem__(self, name):
+        record = self.get(name)
+        if record is None:
+            raise KeyError(name)
+        return record
+
+    def _check_phone(self, name, phone):
+        row = self.connection.execute(
+            "SELECT c.name FROM phones p JOIN contacts c ON c.id = p.contact_id WHERE p.phone = ? AND c.name != ? LIMIT 1",
+            (phone, name),
+        ).fetchone()
+        if row:
+            raise DuplicatePhoneError(f"Phone number {phone} already belongs to contact {row[0]}.")
+
+    def _claim_phone(self, record, number):
+        if self.unique_phones:
+            self._check_phone(record.name.value, "%010d" % number)
+
+    def _record_changed(self, record, op, *args):
+        contact_id = self._contact_id(record.name.value)
+        if contact_id is None:
+            return
+        if op == "add_phone":
+            self._write(
+                "INSERT INTO phones (contact_id, position, phone) "
+                "SELECT ?, COALESCE(MAX(position), -1) + 1, ? FROM phones WHERE contact_id = ?",
+                (contact_id, args[0].value, contact_id),
+            )
+        elif op == "change_phone":
+            self._write(
+                "UPDATE phones SET phone = ? WHERE contact_id = ? AND phone = ?",
+                (args[1].value, contact_id, args[0].value),
+            )
+        elif op == "birthday":
+            self._write(
+                "UPDATE contacts SET birthday = ?, birthday_md = ? WHERE id = ?",
+                (*birthday_columns(args[0]), contact_id),
+            )
+
+    def complete(self, prefix, limit=None):
+        # LIKE only folds ASCII case: it narrows ASCII prefixes down, name_key decides.
+        key = name_key(prefix)
+        pattern = like_pattern(prefix)[1:] if prefix.isascii() else "%"
+        names = self.connection.execute(
+            "SELECT name FROM contacts WHERE name LIKE ? ESCAPE '\\' ORDER BY name", (pattern,)
+        )
+        return [name for (name,) in names if name_key(name).startswith(key)][:limit]
+
+    def get_all_contacts(self):
+        return self._select()
+
+    def get_contacts(self, start, stop):
+        return self._select(suffix="ORDER BY name LIMIT ? OFFSET ?", parameters=(max(stop - start, 0), start))
+
+    def page_after(self, cursor, page_size=None):
+        page_size = page_size or self.page_size
+        if cursor is None:
+            records = self._select(suffix="ORDER BY name LIMIT ?", parameters=(page_size,))
+        else:
+            records = self._select("WHERE name > ?", (Name(cursor).value, page_size), "ORDER BY name LIMIT ?")
+        next_cursor = records[-1].name.value if records else None
+        return records, next_cursor
+
+
+    def search(self, term):
+        pattern = like_pattern(term.lower())
+        return self._select(
+            "WHERE name LIKE ? ESCAPE '\\' OR id IN (SELECT contact_id FROM phones WHERE phone LIKE ? ESCAPE '\\')",
+            (pattern, pattern),
+        )
+
+    def query(self, term, limit=None, offset=0):
+        # Same ranking as AddressBook.query, computed by SQLite's ORDER BY.
+        term = term.lower()
+        pattern = like_pattern(term)
+        prefix = pattern[1:]
+        phone_ids = "SELECT contact_id FROM phones WHERE phone"
+        yield from self._select(
+            f"WHERE name LIKE :pattern ESCAPE '\\' OR id IN ({phone_ids} LIKE :pattern ESCAPE '\\')",
+            {"pattern": pattern, "prefix": prefix, "term": term, "limit": -1 if limit is None else limit, "offset": offset},
+            f"""ORDER BY CASE
+                WHEN id IN ({phone_ids} = :term) THEN 0
+                WHEN name LIKE :prefix ESCAPE '\\' THEN 1
+                WHEN id IN ({phone_ids} LIKE :prefix ESCAPE '\\') THEN 2
+                WHEN name LIKE :pattern ESCAPE '\\' THEN 3
+                ELSE 4
+            END, name LIMIT :limit OFFSET :offset""",
+        )
+
+    def fuzzy_search(self, term, max_distance=2, limit=None):
+        # SQLite has no edit distance, so only the names are scanned and matches hydrated.
+        names = (name for (name,) in self.connection.execute("SELECT name FROM contacts"))
+        found = fuzzy_scan(names, term, max_distance)[:limit]
+        return [(distance, self.get(name)) for distance, name in found]
+
+    def whois(self, phone):
+        phone = Phone(phone).value
+        return self._select("WHERE id IN (SELECT contact_id FROM phones WHERE phone = ?)", (phone,))
+
+    def upcoming_birthdays(self, days, today=None):
+        # The (month, day) window is pushed to the birthday_md index; exact day counts,
+        # including Feb 29 in non-leap years, are settled per matching row.
+        today = today or date.today()
+        if days >= 365:
+            records = self._select("WHERE birthday IS NOT NULL")
+        else:
+            last = today + timedelta(days=days)
+            start, end = today.month * 100 + today.day, last.month * 100 + last.day
+            if end == 228:
+                end = 229
+            if start <= end:
+                records = self._select("WHERE birthday_md BETWEEN ? AND ?", (start, end))
+            else:
+                records = self._select("WHERE birthday_md >= ? OR birthday_md <= ?", (start, end))
+
+        found = []
+        for record in records:
+            days_left = (next_birthday(record.birthday_date(), today) - today).days
+            if days_left <= days:
+                found.append((days_left, record))
+        found.sort(key=lambda item: (item[0], item[1].name.value))
+        return found
+
+    def _birthday_columns(self):
+        rows = self.connection.execute("SELECT name, birthday FROM contacts WHERE birthday IS NOT NULL")
+        return BirthdayColumns.from_items((name, date.fromordinal(ordinal)) for name, ordinal in rows)
+
+    def nearest_birthdays(self, count=None, today=None):
+        found = self._birthday_columns().nearest(today or current_day(), count)
+        return [(days_left, self.get(name)) for days_left, name in found]
+
+    def birthdays_in_month(self, month):
+        # birthday_md is month * 100 + day, so a month is one indexed range.
+        return self._select("WHERE birthday_md BETWEEN ? AND ?", (month * 100 + 1, month * 100 + 31), "ORDER BY birthday_md, name")
+
+    def contacts_aged(self, min_age, max_age, today=None):
+        found = self._birthday_columns().aged(min_age, max_age, today or current_day())
+        return [(age, self.get(name)) for age, name in found]
+
+    @classmethod
+    def from_json(cls, json_path, file_path, batch_size=10000):
+        if os.path.exists(journal_path(json_path)):
+            load_folded(json_path)  # the file is streamed below, so it has to hold every change
+        book = cls(file_path, batch_size=batch_size)
+        with open(json_path, "r") as file:
+            for contact_data in iter_array_items(file, "contacts"):
+                name = contact_data.get("name")
+                birthday_str = contact_data.get("birthday")
+                birthday = Birthday(parse_date(birthday_str)) if birthday_str else None
+                phones = [Phone(phone).value for phone in contact_data.get("phones", [])]
+                book._write("DELETE FROM contacts WHERE name = ?", (name,))
+                book._insert(name, phones, *birthday_columns(birthday))
+        book.save_data()
+        return book
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("/// Usage: python sqlite_book.py [address_book.json] [address_book.db]")
+        sys.exit(1)
+    store = SQLiteAddressBook.from_json(sys.argv[1], sys.argv[2])
+    print(f"/// {len(store)} contacts written to {sys.argv[2]}")
+    store.close()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+
+ASSISTANT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assistant")
+if ASSISTANT_DIR not in sys.path:
+    sys.path.insert(0, ASSISTANT_DIR)
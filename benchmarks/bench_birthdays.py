@@ -0,0 +1,82 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import birthday_columns
+from benchmarks.synthetic import iter_contacts
+from birthday_index import current_day
+from cl_hw12 import AddressBook, Birthday, Record, render_records
+
+
+def build_book(path, count):
+    book = AddressBook(path)
+    with book.bulk():
+        for contact in iter_contacts(count):
+            birthday = contact["birthday"]
+            birthday = Birthday(datetime.strptime(birthday, "%d-%m-%Y").date()) if birthday else None
+            book[contact["name"]] = Record.restore(contact["name"], contact["phones"], birthday)
+    return book
+
+
+def best(run, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def per_record_nearest(book, today):
+    found = [(record.days_to_birthday(today), record.name.value) for record in book.data.values() if record.birthday]
+    return sorted(found)[:10]
+
+
+def per_record_aged(book, today):
+    found = []
+    for record in book.data.values():
+        birthday = record.birthday_date()
+        if birthday:
+            age = today.year - birthday.year - ((birthday.month, birthday.day) > (today.month, today.day))
+            if 30 <= age <= 39:
+                found.append((age, record.name.value))
+    return sorted(found)
+
+
+def cold_render(records, render):
+    for record in records:
+        record._rendered = None
+    render(records)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Per-record vs columnar birthday queries and rendering.")
+    arg_parser.add_argument("count", nargs="?", type=int, default=100000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        book = build_book(os.path.join(directory, "address_book.json"), args.count)
+    today = current_day()
+    records = list(book.data.values())
+    rows = [
+        ("nearest 10", lambda: per_record_nearest(book, today), lambda: book.nearest_birthdays(10, today)),
+        ("aged 30-39", lambda: per_record_aged(book, today), lambda: book.contacts_aged(30, 39, today)),
+        (
+            "render (cold)",
+            lambda: cold_render(records, lambda batch: [str(record) for record in batch]),
+            lambda: cold_render(records, render_records),
+        ),
+    ]
+    backend = "numpy" if birthday_columns.use_numpy() is not None else "array"
+    print(f"contacts: {args.count}, columns: {backend}")
+    print(f"{'query':<14} {'per record ms':>14} {'columnar ms':>12}")
+    for name, per_record, columnar in rows:
+        slow, fast = best(per_record, args.repeat), best(columnar, args.repeat)
+        print(f"{name:<14} {slow * 1000:>14.1f} {fast * 1000:>12.1f} ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_book
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(path):
+    from cl_hw12 import AddressBook
+
+    baseline = peak_rss_kb()
+    started = time.perf_counter()
+    book = AddressBook(path)
+    elapsed = time.perf_counter() - started
+    print(len(book), elapsed, baseline, peak_rss_kb())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Address book load time and peak RSS by contact count.")
+    parser.add_argument("counts", nargs="*", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    print(f"{'contacts':>10} {'file MB':>8} {'load s':>8} {'contacts/s':>11} {'peak RSS MB':>12} {'delta MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.counts:
+            path = write_book(os.path.join(tmp, f"book_{count}.json"), count)
+            # Each size runs in a fresh interpreter so peak RSS is not carried over.
+            output = subprocess.check_output([sys.executable, "-m", "benchmarks.bench_load", "--child", path])
+            loaded, elapsed, baseline, peak = output.split()
+            loaded, elapsed = int(loaded), float(elapsed)
+            print(
+                f"{loaded:>10} {os.path.getsize(path) / 2 ** 20:>8.1f} {elapsed:>8.3f} {loaded / elapsed:>11.0f} "
+                f"{int(peak) / 1024:>12.1f} {(int(peak) - int(baseline)) / 1024:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
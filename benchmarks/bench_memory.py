@@ -0,0 +1,76 @@
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.synthetic import iter_contacts
+from cl_hw12 import Birthday, Record
+
+
+class LegacyName:
+    def __init__(self, value=None):
+        self._value = value
+
+
+class LegacyPhone:
+    def __init__(self, value=None):
+        self._value = value
+
+
+class LegacyBirthday:
+    def __init__(self, value=None):
+        self._value = value
+
+
+class LegacyRecord:
+    # The record layout before the compact model: one __dict__-backed object per field.
+    def __init__(self, name, phones, birthday=None):
+        self.name = LegacyName(name)
+        self.phones = [LegacyPhone(phone) for phone in phones]
+        self.birthday = birthday
+
+
+def build_legacy(contacts):
+    records = {}
+    for contact in contacts:
+        birthday = contact["birthday"]
+        birthday = LegacyBirthday(datetime.strptime(birthday, "%d-%m-%Y").date()) if birthday else None
+        # Names and phones are copied so the source dicts don't share the strings.
+        records[contact["name"]] = LegacyRecord(contact["name"][:1] + contact["name"][1:], [p[:1] + p[1:] for p in contact["phones"]], birthday)
+    return records
+
+
+def build_compact(contacts):
+    records = {}
+    for contact in contacts:
+        birthday = contact["birthday"]
+        birthday = Birthday(datetime.strptime(birthday, "%d-%m-%Y").date()) if birthday else None
+        records[contact["name"]] = Record.restore(contact["name"][:1] + contact["name"][1:], contact["phones"], birthday)
+    return records
+
+
+def measure(build, contacts):
+    gc.collect()
+    tracemalloc.start()
+    records = build(contacts)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per contact of the legacy and compact record models.")
+    parser.add_argument("count", nargs="?", type=int, default=100000)
+    args = parser.parse_args()
+
+    contacts = list(iter_contacts(args.count))
+    legacy = measure(build_legacy, contacts)
+    compact = measure(build_compact, contacts)
+    print(f"contacts: {args.count}")
+    print(f"legacy:  {legacy / args.count:8.1f} bytes/contact")
+    print(f"compact: {compact / args.count:8.1f} bytes/contact ({compact / legacy:.0%} of legacy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import timeit
+
+import b_hw12
+
+
+INPUTS = (
+    "hello",
+    "add John 0501234567 01.02.1990",
+    "cp John 0501234567 0671234567",
+    "search jo",
+    "sc 3",
+    "sc all",
+    "good bye",
+    "help",
+    "no-such-command with args",
+)
+
+
+def linear_parser(text):
+    # The former parser: a scan over every command checking only the first word.
+    if not text.strip():
+        return b_hw12.unknown_handler, []
+
+    command_parts = text.strip().split()
+    cmd = command_parts[0]
+    data = command_parts[1:] if len(command_parts) > 1 else []
+
+    for handler, keywords in b_hw12.COMMANDS.items():
+        if cmd.lower() in keywords:
+            return handler, data
+    return b_hw12.unknown_handler, []
+
+
+def bench(parse, number):
+    def run():
+        for text in INPUTS:
+            parse(text)
+
+    best = min(timeit.repeat(run, number=number, repeat=5))
+    return best / (number * len(INPUTS)) * 1e9
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Micro-benchmark of command parsing.")
+    arg_parser.add_argument("--number", type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    linear = bench(linear_parser, args.number)
+    table = bench(b_hw12.parser, args.number)
+    print(f"linear scan:    {linear:8.0f} ns/command")
+    print(f"dispatch table: {table:8.0f} ns/command ({linear / table:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import b_hw12
+from benchmarks.synthetic import iter_contacts
+from cl_hw12 import AddressBook, Birthday, Record
+
+
+def build_book(path, count):
+    book = AddressBook(path)
+    for contact in iter_contacts(count):
+        birthday = contact["birthday"]
+        birthday = Birthday(datetime.strptime(birthday, "%d-%m-%Y").date()) if birthday else None
+        book[contact["name"]] = Record.restore(contact["name"], contact["phones"], birthday)
+    return book
+
+
+def show_all(out):
+    started = time.perf_counter()
+    for chunk in b_hw12.show_all_handler("all"):
+        out.write(chunk)
+        out.write("\n")
+    return time.perf_counter() - started
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Time of 'sc all' with cold and warm record rendering caches.")
+    arg_parser.add_argument("count", nargs="?", type=int, default=100000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        b_hw12.address_book = build_book(os.path.join(directory, "address_book.json"), args.count)
+    records = list(b_hw12.address_book.data.values())
+    with open(os.devnull, "w") as out:
+        cold = []
+        for _ in range(args.repeat):
+            for record in records:
+                record._rendered = None
+            cold.append(show_all(out))
+        warm = min(show_all(out) for _ in range(args.repeat))
+    cold = min(cold)
+    print(f"contacts: {args.count}")
+    print(f"cold cache: {cold * 1000:8.1f} ms")
+    print(f"warm cache: {warm * 1000:8.1f} ms ({cold / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import SYLLABLES, iter_contacts
+from cl_hw12 import Birthday, Record
+from sharded_book import ShardedAddressBook
+
+
+def fill(book, count):
+    started = time.perf_counter()
+    with book.bulk():
+        for contact in iter_contacts(count):
+            birthday = contact["birthday"]
+            birthday = Birthday(datetime.strptime(birthday, "%d-%m-%Y").date()) if birthday else None
+            book[contact["name"]] = Record.restore(contact["name"], contact["phones"], birthday)
+    return time.perf_counter() - started
+
+
+def rate(operation, arguments):
+    started = time.perf_counter()
+    for argument in arguments:
+        operation(argument)
+    return len(arguments) / (time.perf_counter() - started)
+
+
+def run(shards, count, queries, directory):
+    book = ShardedAddressBook(os.path.join(directory, f"bench{shards}.json"), shards)
+    try:
+        fill_time = fill(book, count)
+        rng = random.Random(1)
+        terms = [rng.choice(SYLLABLES) + rng.choice(SYLLABLES) for _ in range(queries)]
+        names = [contact["name"] for contact in iter_contacts(queries, seed=0)]
+        return {
+            "fill": fill_time,
+            "search": rate(lambda term: list(book.query(term, 50)), terms),
+            "get": rate(book.get, names),
+            "birthdays": rate(lambda days: book.upcoming_birthdays(days), [7] * max(queries // 10, 1)),
+        }
+    finally:
+        book.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Throughput of the sharded address book with 1 vs N shards.")
+    arg_parser.add_argument("count", nargs="?", type=int, default=200000)
+    arg_parser.add_argument("--shards", type=int, default=os.cpu_count() or 4)
+    arg_parser.add_argument("--queries", type=int, default=500)
+    args = arg_parser.parse_args()
+
+    print(f"contacts: {args.count}, cores: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as directory:
+        results = {shards: run(shards, args.count, args.queries, directory) for shards in sorted({1, args.shards})}
+    print(f"{'shards':>6} {'fill s':>8} {'search/s':>10} {'get/s':>10} {'birthdays/s':>12}")
+    for shards, result in results.items():
+        print(f"{shards:>6} {result['fill']:>8.2f} {result['search']:>10.0f} {result['get']:>10.0f} {result['birthdays']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_book
+from cl_hw12 import AddressBook
+from snapshot import COMPRESSIONS
+
+
+def best(run, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="File size, save and load time of JSON vs binary snapshots.")
+    arg_parser.add_argument("count", nargs="?", type=int, default=100000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = write_book(os.path.join(directory, "address_book.json"), args.count)
+        book = AddressBook(source)
+        formats = [("json", "json", None)] + [(f"binary {name}", "binary", name) for name in COMPRESSIONS]
+        print(f"contacts: {args.count}")
+        print(f"{'format':<14} {'size MB':>8} {'save ms':>8} {'load ms':>8}")
+        for label, snapshot_format, compression in formats:
+            book.file_path = os.path.join(directory, f"book.{snapshot_format}.{compression}")
+            book.snapshot_format = snapshot_format
+            book.compression = compression
+            save = best(book.save_data, args.repeat)
+            load = best(lambda: AddressBook(book.file_path), args.repeat)
+            size = os.path.getsize(book.file_path) / 2 ** 20
+            print(f"{label:<14} {size:>8.2f} {save * 1000:>8.0f} {load * 1000:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
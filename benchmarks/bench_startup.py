@@ -0,0 +1,82 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_book
+
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assistant", "b_hw12.py")
+PROMPT = b"/// ---> "
+
+
+def read_until_prompt(process, started):
+    output = b""
+    while not output.endswith(PROMPT):
+        chunk = os.read(process.stdout.fileno(), 65536)
+        if not chunk:
+            raise RuntimeError(f"the CLI exited before prompting: {output[-200:]!r}")
+        output += chunk
+    return time.perf_counter() - started
+
+
+def startup(path, answer=True):
+    # (time to the first prompt, time to the answer of the first command that needs
+    # the book). Without `answer` the CLI is killed at the prompt and only the first is timed.
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, CLI, "-i", "--autosave", "0", "--file", path],
+        cwd=os.path.dirname(path), stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0,
+    )
+    try:
+        first_prompt = read_until_prompt(process, started)
+        if not answer:
+            return first_prompt, None
+        process.stdin.write(b"sc 1\n")
+        first_answer = read_until_prompt(process, started)
+        process.stdin.write(b"exit\n")
+        process.stdin.close()
+        process.wait()
+    finally:
+        process.kill()
+        process.wait()
+        process.stdin.close()
+        process.stdout.close()
+    return first_prompt, first_answer
+
+
+def measure(count, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_book(os.path.join(directory, "address_book.json"), count)
+        runs = [startup(path) for _ in range(repeat)]
+    prompts, answers = zip(*runs)
+    return {
+        "first_prompt": {"min_s": min(prompts), "median_s": statistics.median(prompts)},
+        "first_answer": {"min_s": min(answers), "median_s": statistics.median(answers)},
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="CLI time to first prompt and to the first answer that needs the book.")
+    arg_parser.add_argument("counts", nargs="*", type=int, default=[0, 100000])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--budget", type=float, default=250.0, metavar="MS", help="fail if the first prompt takes longer")
+    args = arg_parser.parse_args()
+
+    over_budget = False
+    print(f"{'contacts':>10} {'first prompt ms':>16} {'first answer ms':>16}")
+    for count in args.counts:
+        result = measure(count, args.repeat)
+        prompt = result["first_prompt"]["min_s"] * 1000
+        over_budget |= prompt > args.budget
+        print(f"{count:>10} {prompt:>16.1f} {result['first_answer']['min_s'] * 1000:>16.1f}")
+    if over_budget:
+        print(f"/// Time to first prompt is over the {args.budget:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import json
+import sys
+
+
+METRICS = (("min_s", "time"), ("peak_bytes", "memory"))
+# Smaller differences are noise, whatever the ratio.
+FLOORS = {"time": 0.001, "memory": 1 << 20}
+
+
+def compare(baseline, current, threshold):
+    # Yields (size, operation, what, old, new, regressed) for everything both runs measured.
+    for size, operations in sorted(current["results"].items(), key=lambda item: int(item[0])):
+        old_operations = baseline["results"].get(size)
+        if old_operations is None:
+            continue
+        for operation, result in operations.items():
+            old_result = old_operations.get(operation)
+            if old_result is None or not isinstance(result, dict):
+                continue
+            for key, what in METRICS:
+                if key not in result or key not in old_result:
+                    continue
+                old, new = old_result[key], result[key]
+                regressed = new - old > FLOORS[what] and new > old * (1 + threshold)
+                yield size, operation, what, old, new, regressed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare two benchmark suite results; exits 1 on a regression.")
+    arg_parser.add_argument("baseline")
+    arg_parser.add_argument("current")
+    arg_parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown or growth, 0.10 = 10%%")
+    args = arg_parser.parse_args()
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+
+    regressions = 0
+    print(f"{'contacts':>10} {'operation':<20} {'metric':<7} {'baseline':>12} {'current':>12} {'change':>8}")
+    for size, operation, what, old, new, regressed in compare(baseline, current, args.threshold):
+        change = f"{new / old - 1:+.1%}" if old else "n/a"
+        scale, unit = (1000, "ms") if what == "time" else (1 / 2 ** 20, "MB")
+        print(
+            f"{size:>10} {operation:<20} {what:<7} {old * scale:>9.2f} {unit} {new * scale:>9.2f} {unit} "
+            f"{change:>8}{'  REGRESSION' if regressed else ''}"
+        )
+        regressions += regressed
+    if regressions:
+        print(f"/// {regressions} regression(s) over {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"/// No regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
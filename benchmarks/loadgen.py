@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import random
+import time
+
+
+def make_command(rng, client, index, write_ratio):
+    if rng.random() < write_ratio:
+        return f"add Load{client}x{index} {rng.randrange(10 ** 9, 10 ** 10)}"
+    kind = rng.random()
+    if kind < 0.4:
+        return f"search {rng.choice('abcdefghijklmnoprstuvy')}{rng.choice('aeiou')}{rng.choice('nrlst')}"
+    if kind < 0.7:
+        return f"sc {rng.randint(1, 20)}"
+    if kind < 0.9:
+        return f"whois {rng.randrange(10 ** 9, 10 ** 10)}"
+    return "bd 7"
+
+
+async def read_response(reader):
+    # Responses end with an empty line.
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line or line == b"\n":
+            return lines
+        lines.append(line)
+
+
+async def run_client(client, args, latencies):
+    rng = random.Random(args.seed + client)
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    for index in range(args.requests):
+        command = make_command(rng, client, index, args.write_ratio)
+        started = time.perf_counter()
+        writer.write(command.encode("utf-8") + b"\n")
+        await writer.drain()
+        await read_response(reader)
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+    await writer.wait_closed()
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(args):
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(client, args, latencies) for client in range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"clients: {args.clients}, requests: {len(latencies)}, write ratio: {args.write_ratio:.0%}")
+    print(f"throughput: {len(latencies) / elapsed:.0f} requests/s")
+    print(f"latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms, p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the assistant server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500, help="requests per client")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
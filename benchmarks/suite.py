@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.bench_startup import startup
+from benchmarks.synthetic import SYLLABLES, write_book
+
+
+SIZES = (1000, 100000, 1000000)
+SEARCH_TERMS = 20
+PAGES = 100
+PARSER_INPUTS = (
+    "hello",
+    "add John 0501234567 01.02.1990",
+    "cp John 0501234567 0671234567",
+    "search jo --limit 10",
+    "sc 3",
+    "sc all",
+    "good bye",
+    "no-such-command with args",
+)
+
+
+def operations(path, seed):
+    # name -> (setup, run): setup() builds the state a single run needs and is not timed.
+    import b_hw12
+    from cl_hw12 import AddressBook
+
+    book = AddressBook(path)
+    b_hw12.address_book = book
+    rng = random.Random(seed)
+    terms = [rng.choice(SYLLABLES) + rng.choice(SYLLABLES) for _ in range(SEARCH_TERMS)]
+    pages = [str(rng.randint(1, book.page_count())) for _ in range(PAGES)]
+
+    def search():
+        for term in terms:
+            b_hw12.search_handler(term)
+
+    def show_pages():
+        for page in pages:
+            b_hw12.show_all_handler(page)
+
+    def parse():
+        for _ in range(1000):
+            for text in PARSER_INPUTS:
+                b_hw12.parser(text)
+
+    return {
+        "load_data": (lambda: None, lambda _: AddressBook(path)),
+        "save_data": (lambda: None, lambda _: book.save_data()),
+        "search_handler": (lambda: None, lambda _: search()),
+        "show_contacts_page": (lambda: None, lambda _: show_pages()),
+        "parser": (lambda: None, lambda _: parse()),
+    }
+
+
+def measure(setup, run, repeat):
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        started = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - started)
+    # One more run under tracemalloc for the peak; it slows Python down, so it is not timed.
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"min_s": min(times), "median_s": statistics.median(times), "peak_bytes": peak}
+
+
+def child(path, repeat, seed):
+    # Runs in a fresh interpreter per size.
+    results = {name: measure(setup, run, repeat) for name, (setup, run) in operations(path, seed).items()}
+    results["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    json.dump(results, sys.stdout)
+
+
+def run_size(count, repeat, seed, directory):
+    path = write_book(os.path.join(directory, f"book_{count}.json"), count, seed)
+    output = subprocess.check_output(
+        [sys.executable, "-m", "benchmarks.suite", "--child", path, "--repeat", str(repeat), "--seed", str(seed)]
+    )
+    results = json.loads(output)
+    prompts = [startup(path, answer=False)[0] for _ in range(repeat)]
+    results["first_prompt"] = {"min_s": min(prompts), "median_s": statistics.median(prompts)}
+    os.remove(path)
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Time and peak memory of the main operations by book size.")
+    arg_parser.add_argument("sizes", nargs="*", type=int, default=list(SIZES))
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", default="benchmark_results.json")
+    arg_parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    if args.child:
+        return child(args.child, args.repeat, args.seed)
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    print(f"{'contacts':>10} {'operation':<20} {'min ms':>10} {'median ms':>10} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.sizes:
+            results = report["results"][str(count)] = run_size(count, args.repeat, args.seed, directory)
+            for name, result in results.items():
+                if name == "max_rss_bytes":
+                    continue
+                print(
+                    f"{count:>10} {name:<20} {result['min_s'] * 1000:>10.2f} "
+                    f"{result['median_s'] * 1000:>10.2f} {result.get('peak_bytes', 0) / 2 ** 20:>9.1f}"
+                )
+            print(f"{count:>10} {'max RSS':<20} {'':>10} {'':>10} {results['max_rss_bytes'] / 2 ** 20:>9.1f}")
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"/// Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import json
+import os
+import random
+from datetime import date
+
+
+SYLLABLES = ("an", "na", "ol", "ek", "sa", "iv", "ma", "ri", "to", "le", "ka", "dy", "ser", "hi", "yu", "ia")
+OPERATORS = ("050", "063", "066", "067", "068", "073", "093", "095", "096", "097", "098", "099")
+BIRTHDAY_FROM = date(1950, 1, 1).toordinal()
+BIRTHDAY_TO = date(2010, 12, 31).toordinal()
+
+
+def make_contact(rng, index):
+    name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize() + str(index)
+    phones = [
+        rng.choice(OPERATORS) + "%07d" % rng.randrange(10 ** 7)
+        for _ in range(rng.choice((1, 1, 1, 2, 2, 3)))
+    ]
+    birthday = None
+    if rng.random() < 0.8:
+        birthday = date.fromordinal(rng.randint(BIRTHDAY_FROM, BIRTHDAY_TO)).strftime("%d-%m-%Y")
+    return {"name": name, "phones": phones, "birthday": birthday}
+
+
+def iter_contacts(count, seed=0):
+    rng = random.Random(seed)
+    for index in range(count):
+        yield make_contact(rng, index)
+
+
+def write_book(path, count, seed=0):
+    with open(path, "w") as file:
+        file.write('{\n  "contacts": [')
+        for index, contact in enumerate(iter_contacts(count, seed)):
+            file.write(",\n    " if index else "\n    ")
+            file.write(json.dumps(contact))
+        file.write("\n  ]\n}\n")
+    return path
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Write synthetic address books, one file per contact count.")
+    arg_parser.add_argument("counts", nargs="*", type=int, default=[1000, 100000, 1000000])
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--directory", default=".")
+    args = arg_parser.parse_args()
+    for count in args.counts:
+        path = write_book(os.path.join(args.directory, f"address_book_{count}.json"), count, args.seed)
+        print(f"/// {count} contacts written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+from datetime import date
+
+from cl_hw12 import AddressBook, Birthday, journal_path
+
+
+def contents(book):
+    return sorted(record.packed() for record in book.values())
+
+
+def make_changes(book):
+    book.add_record("Ann", "1111111111")
+    book.add_record("Bob", "2222222222")
+    book.add_record("Cid", "3333333333")
+    book["Ann"].add_phone("4444444444")
+    book["Bob"].change_phone("2222222222", "5555555555")
+    book["Cid"].birthday = Birthday(date(1990, 5, 17))
+    del book["Bob"]
+
+
+def test_replay_restores_unsaved_changes(tmp_path):
+    path = str(tmp_path / "book.json")
+    book = AddressBook(path, journal=True)
+    make_changes(book)
+    expected = contents(book)
+    book.journal.close()  # a crash: nothing was saved
+
+    assert not os.path.exists(path)
+    assert contents(AddressBook(path, journal=True)) == expected
+
+
+def test_replay_over_a_snapshot_that_holds_it(tmp_path):
+    # A crash between writing the snapshot and trimming the journal.
+    path = str(tmp_path / "book.json")
+    book = AddressBook(path, journal=True)
+    make_changes(book)
+    expected = contents(book)
+    book.journal.close()
+    shutil.copy(journal_path(path), str(tmp_path / "kept"))
+    book.save_data()
+    shutil.copy(str(tmp_path / "kept"), journal_path(path))
+
+    reloaded = AddressBook(path, journal=True)
+    assert reloaded.journal.count == 7
+    assert contents(reloaded) == expected
+
+
+def test_replaying_twice_changes_nothing(tmp_path):
+    path = str(tmp_path / "book.json")
+    book = AddressBook(path, journal=True)
+    make_changes(book)
+    expected = contents(book)
+    book.journal.close()
+
+    first = AddressBook(path, journal=True)
+    first.journal.close()
+    second = AddressBook(path, journal=True)
+    assert contents(first) == contents(second) == expected
+
+
+def test_legacy_add_phone_entries_replay_once(tmp_path):
+    path = str(tmp_path / "book.json")
+    entries = [
+        {"op": "add", "name": "Ann", "phones": ["1111111111"], "birthday": None},
+        {"op": "add_phone", "name": "Ann", "phone": "2222222222"},
+        {"op": "add_phone", "name": "Ann", "phone": "2222222222"},
+    ]
+    with open(journal_path(path), "w", encoding="utf-8") as file:
+        file.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+    book = AddressBook(path, journal=True)
+    assert book["Ann"].phone_values() == ["1111111111", "2222222222"]
+
+
+def test_torn_trailing_entry_is_truncated(tmp_path):
+    path = str(tmp_path / "book.json")
+    book = AddressBook(path, journal=True)
+    book.add_record("Ann", "1111111111")
+    book.add_record("Bob", "2222222222")
+    book.journal.close()
+    valid_size = os.path.getsize(journal_path(path))
+    with open(journal_path(path), "ab") as file:
+        file.write(b'{"op":"add","name":"Cid","pho')
+
+    reloaded = AddressBook(path, journal=True)
+    assert sorted(reloaded.keys()) == ["ann", "bob"]
+    assert reloaded.journal.count == 2
+    assert os.path.getsize(journal_path(path)) == valid_size
+
+    # New entries go after the good ones, not after the torn bytes.
+    reloaded.add_record("Dan", "3333333333")
+    reloaded.journal.close()
+    assert sorted(AddressBook(path, journal=True).keys()) == ["ann", "bob", "dan"]
+
+
+def test_save_trims_the_journal(tmp_path):
+    path = str(tmp_path / "book.json")
+    book = AddressBook(path, journal=True)
+    make_changes(book)
+    book.save_data()
+    book.add_record("Dan", "3333333333")
+    book.journal.close()
+
+    assert book.journal.count == 1
+    assert contents(AddressBook(path, journal=True)) == contents(book)
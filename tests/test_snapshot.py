@@ -0,0 +1,92 @@
+import json
+import os
+from datetime import date
+
+import pytest
+
+from cl_hw12 import AddressBook, Birthday, journal_path
+from snapshot import BLOCK, COMPRESSIONS, HEADER, convert, is_snapshot, read_snapshot, write_snapshot
+
+CONTACTS = [
+    (f"Contact {index:03d}", [1000000000 + index, 2000000000 + index][:index % 3], index * 100 if index % 2 else 0)
+    for index in range(200)
+]
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_round_trip(tmp_path, compression):
+    path = str(tmp_path / "book.abs")
+    write_snapshot(path, CONTACTS, compression, block_size=512)  # many blocks
+
+    assert is_snapshot(path)
+    assert [(name, list(phones), birthday) for name, phones, birthday in read_snapshot(path)] == CONTACTS
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "book.abs")
+    write_snapshot(path, [])
+    assert list(read_snapshot(path)) == []
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_corrupt_block_is_detected(tmp_path, compression):
+    path = str(tmp_path / "book.abs")
+    write_snapshot(path, CONTACTS, compression, block_size=512)
+    with open(path, "r+b") as file:
+        file.seek(HEADER.size + BLOCK.size + 10)  # inside the first block's stored bytes
+        byte = file.read(1)
+        file.seek(-1, os.SEEK_CUR)
+        file.write(bytes([byte[0] ^ 0xFF]))
+
+    with pytest.raises(ValueError, match="block 0 is corrupt"):
+        list(read_snapshot(path))
+
+
+def test_truncated_snapshot_is_detected(tmp_path):
+    path = str(tmp_path / "book.abs")
+    write_snapshot(path, CONTACTS, block_size=512)
+    with open(path, "r+b") as file:
+        file.truncate(os.path.getsize(path) - BLOCK.size)  # drop the end marker
+
+    with pytest.raises(ValueError, match="truncated"):
+        list(read_snapshot(path))
+
+
+def test_book_saves_and_loads_binary(tmp_path):
+    path = str(tmp_path / "book.abs")
+    book = AddressBook(path, snapshot_format="binary")
+    book.add_record("Ann", "1111111111", Birthday(date(1990, 5, 17)))
+    book.add_record("Bob", "2222222222")
+    book.save_data()
+
+    reloaded = AddressBook(path)
+    assert reloaded.snapshot_format == "binary"
+    assert sorted(record.packed() for record in reloaded.values()) == sorted(record.packed() for record in book.values())
+
+
+def test_convert_folds_a_pending_journal(tmp_path):
+    source = str(tmp_path / "book.json")
+    target = str(tmp_path / "converted.abs")
+    book = AddressBook(source, journal=True)
+    book.add_record("Ann", "1111111111")
+    book.save_data()
+    book.add_record("Bob", "2222222222")  # only in the journal
+    book["Ann"].add_phone("3333333333")
+    book.journal.close()
+
+    convert(source, target)
+
+    assert is_snapshot(target)
+    assert sorted((name, list(phones)) for name, phones, _ in read_snapshot(target)) == [
+        ("Ann", [1111111111, 3333333333]),
+        ("Bob", [2222222222]),
+    ]
+    # The source was brought up to date rather than left behind its journal.
+    with open(source, encoding="utf-8") as file:
+        assert sorted(contact["name"] for contact in json.load(file)["contacts"]) == ["Ann", "Bob"]
+    assert os.path.getsize(journal_path(source)) == 0
+    assert not os.path.exists(journal_path(target))
+
+    back = str(tmp_path / "back.json")
+    assert len(convert(target, back)) == 2
+    assert not is_snapshot(back)